@@ -69,6 +69,36 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Patches kept per game for live sockets resuming after a disconnect
+LIVE_REPLAY_SIZE = 256
+# Updates for one game within this window go out as a single merged patch
+LIVE_COALESCE_WINDOW_MS = 150
+# Live updates waiting for the background dispatcher; when full, the oldest
+# is dropped ("drop_oldest") or the incoming one is ("drop_newest")
+LIVE_DISPATCH_QUEUE_SIZE = 1000
+LIVE_DISPATCH_BATCH_SIZE = 100
+LIVE_DISPATCH_OVERFLOW = "drop_oldest"
+# A socket handling updates this late skips them and catches up with a snapshot
+LIVE_LAG_THRESHOLD_MS = 2000
+# A socket still behind after this long is closed with a resume hint
+LIVE_STALL_TIMEOUT_S = 30
+# Comment line sent on idle Server-Sent Events streams
+LIVE_SSE_HEARTBEAT_S = 15
+# Threads (and so database connections) for the concurrent reads of async views
+PARALLEL_READ_WORKERS = 4
+# Lifetime of cached API responses; a write to the game makes them unreachable sooner
+RESPONSE_CACHE_TIMEOUT = 300
+# For this long after a write the previous response is served while one worker rebuilds it
+RESPONSE_CACHE_STALE_S = 5
+# How long other workers wait for that rebuild when there is no previous response
+RESPONSE_CACHE_WAIT_S = 2
+# Request threads of sync views allowed to wait like that at once; the rest build the response
+RESPONSE_CACHE_SYNC_WAITERS = 4
+# Threads rebuilding stale responses in the background
+RESPONSE_CACHE_REFRESH_WORKERS = 4
+# Lifetime of cached home page fragments; a write to their game makes them unreachable sooner
+FRAGMENT_CACHE_TIMEOUT = 600
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
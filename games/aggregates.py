@@ -0,0 +1,107 @@
+"""Materialized basketball career totals (``PlayerSeasonAggregate``).
+
+The signal handlers in games.signals keep one row per player up to date as
+things happen: a ``PlayerStat`` in a basketball game counts as a match and
+every made shot adds its points to the column of its type, and deleting
+either (undo, removing a game) takes them off again, inside the same
+transaction as the write. ``rebuild`` recomputes every row from the raw
+tables; ``manage.py rebuild_player_aggregates`` runs it.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Min, Value, When
+from django.utils import timezone
+
+from . import versions
+from .models import BasketballShot, Game, PlayerSeasonAggregate, PlayerStat
+
+# Made shot type -> (aggregate column, points)
+SHOT_COLUMNS = {
+    "3PT": ("total_3pt", 3),
+    "2PT": ("total_2pt", 2),
+    "FT": ("total_1pt", 1),
+}
+
+
+def _apply(player_id, team_id, sign: int, matches: int = 0, column: str | None = None, points: int = 0):
+    if sign > 0:
+        PlayerSeasonAggregate.objects.get_or_create(player_id=player_id, defaults={"team_id": team_id})
+
+    def shift(field, amount):
+        if sign > 0:
+            return F(field) + amount
+        # Never below zero (the columns are unsigned on MySQL), so totals that
+        # predate a rebuild cannot break an undo
+        return Case(When(**{f"{field}__gte": amount}, then=F(field) - amount), default=Value(0))
+
+    changes = {"updated_at": timezone.now()}
+    if matches:
+        changes["total_matches"] = shift("total_matches", matches)
+    if column:
+        changes[column] = shift(column, points)
+        changes["total_points"] = shift("total_points", points)
+    PlayerSeasonAggregate.objects.filter(player_id=player_id).update(**changes)
+
+
+def shot_changed(shot: BasketballShot, sign: int) -> None:
+    """Add (sign=1) or take off (sign=-1) the points of shot"""
+    if shot.result != "MADE" or shot.shot_type not in SHOT_COLUMNS:
+        return
+    column, points = SHOT_COLUMNS[shot.shot_type]
+    _apply(shot.player_id, shot.team_id, sign, column=column, points=points)
+
+
+def stat_changed(stat: PlayerStat, sign: int) -> None:
+    """Count (sign=1) or uncount (sign=-1) the match of stat, if it is a basketball game"""
+    try:
+        if stat.game.sport != "BASKETBALL":
+            return
+    except Game.DoesNotExist:
+        return
+    _apply(stat.player_id, stat.team_id, sign, matches=1)
+
+
+def totals() -> dict:
+    """{player_id: aggregate fields} computed from the raw tables"""
+    rows = {}
+
+    def row(player_id, team_id):
+        return rows.setdefault(player_id, {
+            "player_id": player_id,
+            "team_id": team_id,
+            "total_matches": 0,
+            "total_3pt": 0,
+            "total_2pt": 0,
+            "total_1pt": 0,
+            "total_points": 0,
+        })
+
+    matches = (
+        PlayerStat.objects.filter(game__sport="BASKETBALL")
+        .values("player_id").annotate(matches=Count("id"), team_id=Min("team_id"))
+    )
+    for m in matches:
+        row(m["player_id"], m["team_id"])["total_matches"] = m["matches"]
+
+    made = (
+        BasketballShot.objects.filter(result="MADE", shot_type__in=SHOT_COLUMNS)
+        .values("player_id", "shot_type").annotate(made=Count("id"), team_id=Min("team_id"))
+    )
+    for m in made:
+        column, points = SHOT_COLUMNS[m["shot_type"]]
+        r = row(m["player_id"], m["team_id"])
+        r[column] += m["made"] * points
+        r["total_points"] += m["made"] * points
+    return rows
+
+
+@transaction.atomic
+def rebuild() -> int:
+    """Replace every aggregate row with totals recomputed from the raw tables"""
+    rows = totals()
+    PlayerSeasonAggregate.objects.all().delete()
+    PlayerSeasonAggregate.objects.bulk_create(PlayerSeasonAggregate(**r) for r in rows.values())
+    # bulk_create sends no signals; let cached player stats go
+    transaction.on_commit(partial(versions.bump, versions.ALL))
+    return len(rows)
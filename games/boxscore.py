@@ -0,0 +1,144 @@
+"""Box scores of a basketball game.
+
+``BoxScoreEngine`` counts every shooting figure of a game in one grouped
+query over its shots, with a conditional ``Count`` per figure, and fouls and
+assists in one grouped query each; team lines are the sums of their players'.
+So a full box score is four queries (those three and the ``PlayerStat`` rows)
+however many players and shot types there are, and the team lines alone are
+one. Each table is grouped on its own rather than joined, which would
+multiply the shots of a player by their fouls and assists. ``team_shooting``
+gives the team shooting of many games at once.
+"""
+from functools import cached_property
+
+from django.db.models import Count, Q
+
+from .models import BasketballFoul, BasketballShot, PlayerStat
+
+MADE = Q(result='MADE')
+
+# Shooting figures of a line and how to count them over BasketballShot rows
+SHOT_COUNTS = {
+    'shots_attempted': Count('id'),
+    'shots_made': Count('id', filter=MADE),
+    'two_pointers_attempted': Count('id', filter=Q(shot_type='2PT')),
+    'two_pointers_made': Count('id', filter=Q(shot_type='2PT') & MADE),
+    'three_pointers_attempted': Count('id', filter=Q(shot_type='3PT')),
+    'three_pointers_made': Count('id', filter=Q(shot_type='3PT') & MADE),
+    'free_throws_attempted': Count('id', filter=Q(shot_type='FT')),
+    'free_throws_made': Count('id', filter=Q(shot_type='FT') & MADE),
+}
+
+COUNTS = (*SHOT_COUNTS, 'fouls', 'assists')
+
+
+def _percentage(made: int, attempted: int) -> float:
+    return (made / attempted * 100) if attempted > 0 else 0
+
+
+def _with_percentages(line: dict) -> dict:
+    line['fg_percentage'] = _percentage(line['shots_made'], line['shots_attempted'])
+    line['three_pt_percentage'] = _percentage(line['three_pointers_made'], line['three_pointers_attempted'])
+    line['ft_percentage'] = _percentage(line['free_throws_made'], line['free_throws_attempted'])
+    return line
+
+
+def team_shooting(game_ids) -> dict:
+    """{(game_id, team_id): shooting figures and percentages} of many games, in one query"""
+    rows = (
+        BasketballShot.objects.filter(game_id__in=game_ids)
+        .values('game_id', 'team_id')
+        .annotate(**SHOT_COUNTS)
+        .order_by()
+    )
+    return {(row.pop('game_id'), row.pop('team_id')): _with_percentages(row) for row in rows}
+
+
+class BoxScoreEngine:
+    """Team and player lines of one basketball game, each table queried once"""
+
+    def __init__(self, game):
+        self.game = game
+
+    @cached_property
+    def _shots(self) -> dict:
+        rows = (
+            BasketballShot.objects.filter(game_id=self.game.pk)
+            .values('team_id', 'player_id')
+            .annotate(**SHOT_COUNTS)
+            .order_by()
+        )
+        return {(row.pop('team_id'), row.pop('player_id')): row for row in rows}
+
+    @cached_property
+    def _fouls(self) -> dict:
+        rows = (
+            BasketballFoul.objects.filter(game_id=self.game.pk)
+            .values_list('team_id', 'player_id')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        return {(team_id, player_id): count for team_id, player_id, count in rows}
+
+    @cached_property
+    def _assists(self) -> dict:
+        rows = (
+            BasketballShot.objects.filter(game_id=self.game.pk, assist_player__isnull=False)
+            .values_list('team_id', 'assist_player_id')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        return {(team_id, player_id): count for team_id, player_id, count in rows}
+
+    def _counts(self, team_id, player_id) -> dict:
+        line = dict.fromkeys(SHOT_COUNTS, 0)
+        line.update(self._shots.get((team_id, player_id), {}))
+        line['fouls'] = self._fouls.get((team_id, player_id), 0)
+        line['assists'] = self._assists.get((team_id, player_id), 0)
+        return line
+
+    def shooting(self, team_id) -> dict:
+        """Team shooting figures and percentages, from the shots query alone"""
+        line = dict.fromkeys(SHOT_COUNTS, 0)
+        for (shot_team_id, _), row in self._shots.items():
+            if shot_team_id == team_id:
+                for figure, count in row.items():
+                    line[figure] += count
+        # Names the stats page has always used for field goals
+        line['total_shots'] = line['shots_attempted']
+        line['made_shots'] = line['shots_made']
+        return _with_percentages(line)
+
+    def team(self, team_id) -> dict:
+        """shooting plus the team's fouls and assists"""
+        line = self.shooting(team_id)
+        line['fouls'] = sum(n for (t, _), n in self._fouls.items() if t == team_id)
+        line['assists'] = sum(n for (t, _), n in self._assists.items() if t == team_id)
+        return line
+
+    @cached_property
+    def _stats(self) -> list:
+        stats = list(PlayerStat.objects.filter(game_id=self.game.pk).select_related('player').order_by('id'))
+        for stat in stats:
+            for figure, value in _with_percentages(self._counts(stat.team_id, stat.player_id)).items():
+                setattr(stat, figure, value)
+        return stats
+
+    def players(self, team_id, by_points: bool = False) -> list:
+        """The team's PlayerStat rows, each carrying its line's figures as attributes"""
+        stats = [stat for stat in self._stats if stat.team_id == team_id]
+        if by_points:
+            stats.sort(key=lambda stat: stat.points, reverse=True)
+        return stats
+
+    @staticmethod
+    def line(stat) -> dict:
+        """JSON line of a PlayerStat returned by players"""
+        return {
+            'player': {'id': stat.player.id, 'name': stat.player.name},
+            'points': stat.points,
+            **{figure: getattr(stat, figure) for figure in COUNTS},
+            'fg_percentage': stat.fg_percentage,
+            'three_pt_percentage': stat.three_pt_percentage,
+            'ft_percentage': stat.ft_percentage,
+        }
@@ -0,0 +1,243 @@
+"""Live update fan-out.
+
+Every live message is versioned (``"v": PROTOCOL_VERSION``) and carries a
+per-game ``seq`` that grows by one with each update:
+
+* ``{"type": "patch", "game_id", "sport", "seq", "kind", "changes", "events"}``
+  holds only the state fields that changed since the previous update, plus the
+  events that caused it (shot, foul, ...), each tagged with its ``kind``.
+* ``{"type": "snapshot", "game_id", "sport", "seq", "state"}`` holds the full
+  state. It is sent when a socket connects or when a client asks for one after
+  noticing a gap in ``seq``.
+
+The last published state and the sequence counter live in the default cache so
+every worker numbers updates for a game the same way; a short per-game lock in
+the cache keeps one worker's diff, number and store from interleaving with
+another's, so each patch holds the changes since the state of the seq before
+it. The last
+``LIVE_REPLAY_SIZE`` patches of each game are kept there as well, in a ring of
+``seq % LIVE_REPLAY_SIZE`` slots, so a reconnecting client that sends the last
+``seq`` it saw gets only what it missed instead of a snapshot.
+
+``publish`` only queues an update once the surrounding transaction commits.
+The dispatcher (see games.dispatcher) sends it from the server's loop, after
+merging updates for the same game published within ``LIVE_COALESCE_WINDOW_MS``
+into a single patch carrying the latest state and all of their events, so a
+scoring run costs one message per window instead of one per click.
+"""
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import snapshots
+from .dispatcher import Dispatcher
+from .models import Game
+from .snapshots import STATE_TIMEOUT, GameSnapshot
+
+PROTOCOL_VERSION = 1
+
+# Sockets that did not ask for specific games or sports follow everything
+LIVE_GROUP = "live"
+
+REPLAY_SIZE = getattr(settings, "LIVE_REPLAY_SIZE", 256)
+COALESCE_WINDOW = getattr(settings, "LIVE_COALESCE_WINDOW_MS", 0) / 1000
+# Seconds a game's patch lock is held at most
+LOCK_TIMEOUT = 5
+
+
+def game_group(game_id) -> str:
+    """Channel group for viewers of a single game"""
+    return f"game.{game_id}"
+
+
+def sport_group(sport: str) -> str:
+    """Channel group for viewers of every game of one sport"""
+    return f"sport.{sport.lower()}"
+
+
+def groups_for(data: dict) -> list:
+    """Groups a live update for data["game_id"] has to be delivered to"""
+    return [game_group(data["game_id"]), sport_group(data["sport"]), LIVE_GROUP]
+
+
+def _seq_key(game_id) -> str:
+    return f"live:seq:{game_id}"
+
+
+def _ring_key(game_id, seq) -> str:
+    return f"live:ring:{game_id}:{seq % REPLAY_SIZE}"
+
+
+def _next_seq(game_id) -> int:
+    key = _seq_key(game_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counters start at the current time in ms rather than 0, so a counter
+        # lost from the cache restarts above anything a client has already
+        # seen and shows up as a gap instead of as a run of duplicates.
+        cache.add(key, int(time.time() * 1000), None)
+        return cache.incr(key)
+
+
+def _current_seq(game_id) -> int:
+    key = _seq_key(game_id)
+    seq = cache.get(key)
+    if seq is None:
+        cache.add(key, int(time.time() * 1000), None)
+        seq = cache.get(key)
+    return seq
+
+
+def coalesce(updates: list) -> list:
+    """Merge updates per game, keeping the latest state and every event"""
+    merged = {}
+    for update in updates:
+        pending = merged.get(update["game_id"])
+        if pending is None:
+            merged[update["game_id"]] = {**update, "events": list(update["events"])}
+        else:
+            pending["kind"] = update["kind"]
+            pending["state"] = update["state"]
+            pending["events"].extend(update["events"])
+    return list(merged.values())
+
+
+@contextmanager
+def _game_lock(game_id):
+    """Serializes the patches of one game across workers"""
+    key = f"live:lock:{game_id}"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    # A holder that died frees the lock when it expires, by the deadline
+    while not cache.add(key, 1, LOCK_TIMEOUT) and time.monotonic() < deadline:
+        time.sleep(0.005)
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def _patch(update: dict) -> dict:
+    """Number update and turn it into a patch against the last published state"""
+    # Reading the base state, numbering and storing the new one must not
+    # interleave with another worker's, or a patch would carry the changes
+    # against the wrong base for its seq
+    with _game_lock(update["game_id"]):
+        return _patch_locked(update)
+
+
+def _patch_locked(update: dict) -> dict:
+    game_id, state = update["game_id"], update["state"]
+    previous = snapshots.last(game_id) or {}
+    previous_state = previous.get("state", {})
+    changes = {k: v for k, v in state.items() if previous_state.get(k) != v}
+    changes.update({k: None for k in previous_state if k not in state})
+
+    seq = _next_seq(game_id)
+    snapshots.remember(game_id, seq, state)
+
+    message = {
+        "v": PROTOCOL_VERSION,
+        "type": "patch",
+        "game_id": game_id,
+        "sport": update["sport"],
+        "seq": seq,
+        "kind": update["kind"],
+        "changes": changes,
+        "events": update["events"],
+    }
+    cache.set(_ring_key(game_id, seq), message, STATE_TIMEOUT)
+    return message
+
+
+def prepare(updates: list) -> list:
+    """Patches to send for a batch of queued updates"""
+    return [_patch(update) for update in coalesce(updates)]
+
+
+async def deliver(message: dict) -> None:
+    """Deliver a live message to the game, sport and catch-all groups"""
+    layer = get_channel_layer()
+    if not layer:
+        return
+    # Lets each socket measure how far behind the feed it is
+    sent_at = time.time()
+    for group in groups_for(message):
+        await layer.group_send(
+            group,
+            {
+                "type": "push_update",
+                "group": group,
+                "sent_at": sent_at,
+                "data": message,
+            },
+        )
+
+
+dispatcher = Dispatcher(
+    prepare,
+    deliver,
+    window=COALESCE_WINDOW,
+    max_queue=getattr(settings, "LIVE_DISPATCH_QUEUE_SIZE", 1000),
+    batch_size=getattr(settings, "LIVE_DISPATCH_BATCH_SIZE", 100),
+    overflow=getattr(settings, "LIVE_DISPATCH_OVERFLOW", "drop_oldest"),
+)
+
+
+def publish(game: Game, kind: str = "score_update", event: dict | None = None) -> None:
+    """Queue a patch with whatever changed in game, once the current transaction commits.
+
+    Pass the sport-specific row (Basketball, Cricket, ...) when the caller has
+    it; a plain Game costs one extra query to load it.
+    """
+    update = {
+        "game_id": game.id,
+        "sport": game.sport,
+        "kind": kind,
+        "state": GameSnapshot.of(game).state(),
+        "events": [{"kind": kind, **(event or {})}],
+    }
+    transaction.on_commit(partial(dispatcher.enqueue, update))
+
+
+def replay(game_id, last_seq: int) -> list | None:
+    """Patches of game_id after last_seq, or None when the ring no longer has them all"""
+    current = cache.get(_seq_key(game_id))
+    if current is None or last_seq > current:
+        return None
+    if last_seq == current:
+        return []
+    if current - last_seq > REPLAY_SIZE:
+        return None
+
+    seqs = range(last_seq + 1, current + 1)
+    stored = cache.get_many([_ring_key(game_id, seq) for seq in seqs])
+    messages = []
+    for seq in seqs:
+        message = stored.get(_ring_key(game_id, seq))
+        # The slot may hold an older lap of the ring, or nothing at all
+        if not message or message["seq"] != seq:
+            return None
+        messages.append(message)
+    return messages
+
+
+def snapshot(game: Game) -> dict:
+    """Full-state message for game, from the cache when possible"""
+    stored = snapshots.last(game.id)
+    if stored is None:
+        stored = {"seq": _current_seq(game.id), "state": GameSnapshot.of(game).state()}
+        snapshots.remember_if_missing(game.id, stored["seq"], stored["state"])
+    return {
+        "v": PROTOCOL_VERSION,
+        "type": "snapshot",
+        "game_id": game.id,
+        "sport": game.sport,
+        "seq": stored["seq"],
+        "state": stored["state"],
+    }
@@ -0,0 +1,201 @@
+"""Read-through cache of public JSON responses.
+
+Bodies are stored already encoded, under the view, the query string and the
+current resource version (games.versions) of the game or of everything. A
+write bumps that version from its signal handler, so the next request misses
+and rebuilds the body once; every viewer after it is served the stored bytes
+until the following write. Entries of old versions are never read again and
+expire after RESPONSE_CACHE_TIMEOUT seconds.
+
+A body built while a write commits is stored under the version read before
+it, which is already stale, so a cached response is never older than the
+version it is served for.
+
+Rebuilds are single-flight: the request that takes a short lock on the entry
+builds it, and the others wait for it (up to RESPONSE_CACHE_WAIT_S) rather
+than querying too. Sync views tie up a request thread while they wait, so at
+most RESPONSE_CACHE_SYNC_WAITERS of them do and the rest build the response
+themselves. Within RESPONSE_CACHE_STALE_S of a write the previous body is
+served instead, with its own ETag and Last-Modified, while the lock holder
+rebuilds in the background, so a burst of writes at tip-off or the final
+buzzer never sends a crowd of viewers to the database.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial, wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date
+
+from . import parallel, versions
+from .responses import FastJsonResponse
+
+TIMEOUT = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+STALE = getattr(settings, "RESPONSE_CACHE_STALE_S", 5)
+WAIT = getattr(settings, "RESPONSE_CACHE_WAIT_S", 2)
+LOCK_TIMEOUT = getattr(settings, "RESPONSE_CACHE_LOCK_S", 10)
+POLL = 0.05
+
+_refresher = ThreadPoolExecutor(
+    max_workers=getattr(settings, "RESPONSE_CACHE_REFRESH_WORKERS", 4), thread_name_prefix="response-refresh",
+)
+# Request threads of sync views that may sleep waiting for someone else's
+# rebuild at once; past that they build the response themselves
+_sync_waiters = threading.BoundedSemaphore(getattr(settings, "RESPONSE_CACHE_SYNC_WAITERS", 4))
+
+# What a request does about its entry
+HIT, BUILD, REFRESH, STALE_HIT, WAIT_FOR = "hit", "build", "refresh", "stale", "wait"
+
+
+@dataclass
+class _Entry:
+    scope: str
+    version: int
+    base: str
+    query: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.base}:{self.version}:{self.query}"
+
+    @property
+    def latest_key(self) -> str:
+        # The newest body of any version, for serving stale
+        return f"{self.base}:latest:{self.query}"
+
+    @property
+    def lock_key(self) -> str:
+        return f"{self.key}:lock"
+
+
+def _entry(request, view, scope: str) -> _Entry:
+    return _Entry(
+        scope=scope,
+        version=versions.of_request(request, scope),
+        base=f"response:{view.__module__}.{view.__name__}:{scope}",
+        query=hashlib.md5(request.GET.urlencode().encode(), usedforsecurity=False).hexdigest(),
+    )
+
+
+def _plan(entry: _Entry) -> tuple:
+    body = cache.get(entry.key)
+    if body is not None:
+        return HIT, body
+    latest = cache.get(entry.latest_key)
+    # Only a body from just before the last write may stand in for it
+    if latest is not None and time.time_ns() - entry.version > STALE * 1e9:
+        latest = None
+    if cache.add(entry.lock_key, 1, LOCK_TIMEOUT):
+        return (REFRESH, latest) if latest else (BUILD, None)
+    return (STALE_HIT, latest) if latest else (WAIT_FOR, None)
+
+
+def _store(entry: _Entry, response) -> None:
+    if response.status_code != 200 or response.streaming:
+        return
+    cache.set(entry.key, response.content, TIMEOUT)
+    latest = cache.get(entry.latest_key)
+    if latest is None or latest[0] <= entry.version:
+        cache.set(entry.latest_key, (entry.version, response.content), TIMEOUT)
+
+
+def _stale(entry: _Entry, latest: tuple):
+    version, body = latest
+    response = FastJsonResponse.encoded(body)
+    # Set here, condition() leaves them alone and clients revalidate against this body
+    response.headers["ETag"] = f'"{versions.etag(entry.scope, version)}"'
+    response.headers["Last-Modified"] = http_date(versions.modified(version).timestamp())
+    return response
+
+
+def _rebuild(view, entry: _Entry, request, args, kwargs) -> None:
+    try:
+        if iscoroutinefunction(view):
+            response = async_to_sync(view)(request, *args, **kwargs)
+        else:
+            response = view(request, *args, **kwargs)
+        _store(entry, response)
+    finally:
+        cache.delete(entry.lock_key)
+
+
+def _refresh_later(view, entry: _Entry, request, args, kwargs) -> None:
+    _refresher.submit(parallel.isolated(partial(_rebuild, view, entry, request, args, kwargs)))
+
+
+def _cached(scope_for):
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                # Read off the loop; _entry then finds it on the request
+                await versions.aof_request(request, scope_for(kwargs))
+                entry = _entry(request, view, scope_for(kwargs))
+                action, value = await sync_to_async(_plan)(entry)
+                if action == HIT:
+                    return FastJsonResponse.encoded(value)
+                if action == REFRESH:
+                    _refresh_later(view, entry, request, args, kwargs)
+                if action in (REFRESH, STALE_HIT):
+                    return _stale(entry, value)
+                if action == WAIT_FOR:
+                    deadline = time.monotonic() + WAIT
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(POLL)
+                        body = await cache.aget(entry.key)
+                        if body is not None:
+                            return FastJsonResponse.encoded(body)
+                try:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(_store)(entry, response)
+                finally:
+                    if action == BUILD:
+                        await cache.adelete(entry.lock_key)
+                return response
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                entry = _entry(request, view, scope_for(kwargs))
+                action, value = _plan(entry)
+                if action == HIT:
+                    return FastJsonResponse.encoded(value)
+                if action == REFRESH:
+                    _refresh_later(view, entry, request, args, kwargs)
+                if action in (REFRESH, STALE_HIT):
+                    return _stale(entry, value)
+                if action == WAIT_FOR and _sync_waiters.acquire(blocking=False):
+                    try:
+                        deadline = time.monotonic() + WAIT
+                        while time.monotonic() < deadline:
+                            time.sleep(POLL)
+                            body = cache.get(entry.key)
+                            if body is not None:
+                                return FastJsonResponse.encoded(body)
+                    finally:
+                        _sync_waiters.release()
+                try:
+                    response = view(request, *args, **kwargs)
+                    _store(entry, response)
+                finally:
+                    if action == BUILD:
+                        cache.delete(entry.lock_key)
+                return response
+        return wrapper
+    return decorator
+
+
+def for_game(kwarg: str = "game_id"):
+    """Cache a view of the game named by its URL kwarg until that game changes"""
+    return _cached(lambda kwargs: versions.game_scope(kwargs[kwarg]))
+
+
+def for_all():
+    """Cache a view spanning every game until any game changes"""
+    return _cached(lambda kwargs: versions.ALL)
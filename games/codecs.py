@@ -0,0 +1,116 @@
+"""Wire formats for the live feed.
+
+Clients pick one with the WebSocket subprotocol header:
+
+* ``bgsc.msgpack.v1`` - binary msgpack frames (offered only when the optional
+  ``msgpack`` package is installed)
+* ``bgsc.cjson.v1`` - JSON text frames
+* no subprotocol - plain JSON text frames, as before
+
+Both negotiated formats rename the protocol's repeated keys to the short codes
+in ``KEYS``. The first frame on such a socket is ``{"keys": {short: long}}``,
+sent as is, so clients can expand everything that follows.
+"""
+from collections import OrderedDict
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK = "bgsc.msgpack.v1"
+COMPACT_JSON = "bgsc.cjson.v1"
+
+KEYS = {
+    "type": "T",
+    "game_id": "g",
+    "sport": "S",
+    "seq": "q",
+    "kind": "k",
+    "changes": "c",
+    "events": "e",
+    "state": "s",
+    "status": "st",
+    "team1_score": "a1",
+    "team2_score": "a2",
+    "team1_fouls": "f1",
+    "team2_fouls": "f2",
+    "current_quarter": "qt",
+    "actual_start_time": "ts",
+    "winner": "w",
+    "batting_side": "bs",
+    "team1_deaths": "d1",
+    "team2_deaths": "d2",
+    "player_id": "pi",
+    "player_name": "pn",
+    "player_points": "pp",
+    "team_id": "ti",
+    "team_name": "tn",
+    "shot_id": "si",
+    "shot_type": "sy",
+    "result": "r",
+    "points_scored": "ps",
+    "foul_id": "fi",
+    "id": "i",
+    "name": "n",
+}
+
+# Every socket in a worker gets the same bytes for the same patch, so patch
+# frames are encoded once per format and reused across the fan-out.
+FRAME_CACHE_SIZE = 1024
+_frames = OrderedDict()
+
+
+def supported() -> list:
+    """Subprotocols this server can speak, most compact first"""
+    return [MSGPACK, COMPACT_JSON] if msgpack else [COMPACT_JSON]
+
+
+def negotiate(offered) -> str | None:
+    for protocol in supported():
+        if protocol in offered:
+            return protocol
+    return None
+
+
+def compact(value):
+    if isinstance(value, dict):
+        return {KEYS.get(k, k): compact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    return value
+
+
+def _encode(message: dict, protocol: str | None) -> dict:
+    if protocol == MSGPACK:
+        return {"bytes_data": msgpack.packb(message)}
+    if protocol == COMPACT_JSON:
+        return {"text_data": json.dumps(message, separators=(",", ":"))}
+    return {"text_data": json.dumps(message)}
+
+
+def dictionary(protocol: str) -> dict:
+    """First frame of a negotiated socket: the key dictionary, itself uncompressed"""
+    return _encode({"keys": {short: long for long, short in KEYS.items()}}, protocol)
+
+
+def encode(message: dict, protocol: str | None) -> dict:
+    """send() keyword arguments carrying message in the given subprotocol"""
+    if message.get("type") != "patch":
+        return _encode(compact(message) if protocol else message, protocol)
+
+    key = (message["game_id"], message["seq"], protocol)
+    frame = _frames.get(key)
+    if frame is None:
+        frame = _frames[key] = _encode(compact(message) if protocol else message, protocol)
+        if len(_frames) > FRAME_CACHE_SIZE:
+            _frames.popitem(last=False)
+    return frame
+
+
+def decode(text_data=None, bytes_data=None, protocol: str | None = None):
+    """Client control messages are JSON text, or msgpack on a msgpack socket"""
+    if bytes_data is not None and protocol == MSGPACK:
+        return msgpack.unpackb(bytes_data)
+    return json.loads(text_data or "{}")
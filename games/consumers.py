@@ -1,17 +1,257 @@
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
+from django.conf import settings
+from django.db.models import Q
+from urllib.parse import parse_qs
+import time
+
+from games import broadcast, codecs
+from games.broadcast import LIVE_GROUP, game_group, sport_group
+from games.models import Game
+
+SPORTS = {code for code, _ in Game.SPORT_CHOICES}
+MAX_SUBSCRIPTIONS = 50
+LAG_THRESHOLD = getattr(settings, "LIVE_LAG_THRESHOLD_MS", 2000) / 1000
+STALL_TIMEOUT = getattr(settings, "LIVE_STALL_TIMEOUT_S", 30)
+# Application close code telling the client to reconnect with the resume hint
+CLOSE_STALLED = 4008
+
+# Feed counters for this worker, exported by /healthz/live/
+FEED_STATS = {
+    "connections": 0,
+    "lagging": 0,
+    "connected": 0,
+    "skipped": 0,
+    "catch_up_snapshots": 0,
+    "stalled": 0,
+    "max_lag_ms": 0,
+}
+
+
+def feed_stats() -> dict:
+    return dict(FEED_STATS)
+
+
+def _parse_game_ids(values):
+    """Accept ["12,14"] from a query string or [12, 14] from a JSON message"""
+    ids = set()
+    for value in values or []:
+        for part in str(value).split(","):
+            part = part.strip()
+            if part.isdigit():
+                ids.add(int(part))
+    return ids
+
+
+@database_sync_to_async
+def _snapshots(game_ids, sports, everything=False, exclude=()):
+    """Snapshots of the given games plus every live game of the given sports"""
+    if everything:
+        query = Game.objects.filter(status="LIVE")
+    else:
+        query = Game.objects.filter(Q(pk__in=game_ids) | Q(status="LIVE", sport__in=sports))
+    return [broadcast.snapshot(game) for game in query.exclude(pk__in=exclude).order_by("id")]
+
+
+def _parse_last_seq(values, game_ids):
+    """Accept "12:40,14:33", or a bare "40" when exactly one game is followed"""
+    resume = {}
+    for value in values or []:
+        for part in str(value).split(","):
+            game_id, _, seq = part.strip().rpartition(":")
+            if not game_id and len(game_ids) == 1:
+                game_id = str(next(iter(game_ids)))
+            if game_id.isdigit() and seq.isdigit():
+                resume[int(game_id)] = int(seq)
+    return dict(sorted(resume.items())[:MAX_SUBSCRIPTIONS])
+
+
+def _parse_sports(values):
+    sports = set()
+    for value in values or []:
+        for part in str(value).split(","):
+            part = part.strip().upper()
+            if part in SPORTS:
+                sports.add(part)
+    return sports
+
 
 class LiveFeed(AsyncWebsocketConsumer):
+    """Live score feed.
+
+    Clients pick what they follow with ``ws/live/?games=12,14&sports=basketball``
+    or by sending ``{"action": "subscribe", "games": [12], "sports": ["basketball"]}``
+    (and ``"unsubscribe"`` to drop them again). A socket without any
+    subscription follows every game, as before.
+
+    Updates arrive as patches (see games.broadcast). A snapshot of each
+    followed game is sent on connect and on subscribe, and clients that see a
+    gap in ``seq`` ask for fresh ones with ``{"action": "snapshot", "games": [12]}``.
+
+    A client reconnecting with ``last_seq=12:40,14:33`` (or ``last_seq=40``
+    alongside a single ``games=12``) first gets the patches it missed from the
+    replay buffer; games whose gap is no longer buffered get a snapshot instead.
+
+    Clients offering the ``bgsc.msgpack.v1`` or ``bgsc.cjson.v1`` subprotocol
+    get compact frames (see games.codecs); everyone else gets plain JSON.
+
+    A socket handling updates more than ``LIVE_LAG_THRESHOLD_MS`` after they
+    were published skips them and, once it keeps up again, gets one snapshot
+    per game it missed. A socket still behind after ``LIVE_STALL_TIMEOUT_S``
+    is sent ``{"kind": "resume", "last_seq": "12:40,14:33"}`` and closed with
+    code 4008, so it can reconnect and replay from there.
+    """
+
     async def connect(self):
-        self.group = "live"
-        await self.channel_layer.group_add(self.group, self.channel_name)
-        await self.accept()
+        # Live updates have to be sent from the loop this socket is served on
+        broadcast.dispatcher.start()
+        self.game_ids = set()
+        self.sports = set()
+        self.joined = set()
+        self.seqs = {}
+        self.behind = set()
+        self.behind_since = None
+        self.counted = False
+        self.closing = False
+        self.protocol = codecs.negotiate(self.scope.get("subprotocols", []))
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        self._add(_parse_game_ids(params.get("games")), _parse_sports(params.get("sports")))
+        resume = _parse_last_seq(params.get("last_seq"), self.game_ids)
+        await self._sync_groups()
+        await self.accept(subprotocol=self.protocol)
+        self.counted = True
+        FEED_STATS["connections"] += 1
+        FEED_STATS["connected"] += 1
+        if self.protocol:
+            await self.send(**codecs.dictionary(self.protocol))
+        resumed = await self._replay(resume)
+        await self._send_snapshots(
+            self.game_ids - resumed, self.sports, everything=self.joined == {LIVE_GROUP}, exclude=resumed
+        )
 
     async def disconnect(self, code):
-        await self.channel_layer.group_discard(self.group, self.channel_name)
+        for group in self.joined:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.joined = set()
+        if getattr(self, "counted", False):
+            self.counted = False
+            FEED_STATS["connections"] -= 1
+            if self.behind_since is not None:
+                FEED_STATS["lagging"] -= 1
 
-    async def receive(self, text_data):
-        pass
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            msg = codecs.decode(text_data, bytes_data, self.protocol)
+        except Exception:
+            return
+        if not isinstance(msg, dict):
+            return
+
+        action = msg.get("action")
+        games = _parse_game_ids(msg.get("games"))
+        sports = _parse_sports(msg.get("sports"))
+        if action == "snapshot":
+            await self._send_snapshots(set(sorted(games)[:MAX_SUBSCRIPTIONS]), sports)
+            return
+
+        old_games, old_sports = set(self.game_ids), set(self.sports)
+        if action == "subscribe":
+            self._add(games, sports)
+        elif action == "unsubscribe":
+            self.game_ids -= games
+            self.sports -= sports
+        else:
+            return
+        await self._sync_groups()
+        await self._send({
+            "kind": "subscribed",
+            "games": sorted(self.game_ids),
+            "sports": sorted(s.lower() for s in self.sports),
+        })
+        await self._send_snapshots(self.game_ids - old_games, self.sports - old_sports)
 
     async def push_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        # Updates already queued for a socket closed for stalling
+        if self.closing:
+            return
+        data = event["data"]
+        # A game followed directly also reaches us through its sport group
+        if event.get("group", "").startswith("sport.") and data.get("game_id") in self.game_ids:
+            return
+
+        lag = time.time() - event.get("sent_at", time.time())
+        FEED_STATS["max_lag_ms"] = max(FEED_STATS["max_lag_ms"], int(lag * 1000))
+        if lag > LAG_THRESHOLD:
+            await self._fall_behind(data)
+            return
+        if self.behind_since is not None:
+            await self._catch_up()
+            if data["seq"] <= self.seqs.get(data["game_id"], 0):
+                return
+        await self._send(data)
+
+    async def _fall_behind(self, data):
+        """Skip data; close the socket once it has been behind for too long"""
+        now = time.monotonic()
+        if self.behind_since is None:
+            self.behind_since = now
+            FEED_STATS["lagging"] += 1
+        elif now - self.behind_since > STALL_TIMEOUT:
+            await self._close_stalled()
+            return
+        self.behind.add(data["game_id"])
+        FEED_STATS["skipped"] += 1
+
+    async def _catch_up(self):
+        games, self.behind, self.behind_since = self.behind, set(), None
+        FEED_STATS["lagging"] -= 1
+        FEED_STATS["catch_up_snapshots"] += len(games)
+        await self._send_snapshots(games, ())
+
+    async def _close_stalled(self):
+        # Groups and counters are released by disconnect once the socket is closed
+        self.closing = True
+        FEED_STATS["stalled"] += 1
+        hint = ",".join(f"{game_id}:{seq}" for game_id, seq in sorted(self.seqs.items()))
+        await self._send({"kind": "resume", "last_seq": hint})
+        await self.close(code=CLOSE_STALLED)
+
+    async def _send(self, message):
+        if "seq" in message:
+            self.seqs[message["game_id"]] = message["seq"]
+        await self.send(**codecs.encode(message, self.protocol))
+
+    async def _replay(self, resume):
+        """Send missed patches for each game in resume; return the games fully caught up"""
+        resumed = set()
+        for game_id, last_seq in resume.items():
+            messages = await sync_to_async(broadcast.replay)(game_id, last_seq)
+            if messages is None:
+                continue
+            for message in messages:
+                await self._send(message)
+            resumed.add(game_id)
+        return resumed
+
+    async def _send_snapshots(self, game_ids, sports, everything=False, exclude=()):
+        if not (game_ids or sports or everything):
+            return
+        for message in await _snapshots(game_ids, sports, everything, exclude):
+            await self._send(message)
+
+    def _add(self, games, sports):
+        room = MAX_SUBSCRIPTIONS - len(self.game_ids) - len(self.sports)
+        self.game_ids |= set(sorted(games - self.game_ids)[:max(room, 0)])
+        room = MAX_SUBSCRIPTIONS - len(self.game_ids) - len(self.sports)
+        self.sports |= set(sorted(sports - self.sports)[:max(room, 0)])
+
+    async def _sync_groups(self):
+        wanted = {game_group(gid) for gid in self.game_ids} | {sport_group(s) for s in self.sports}
+        if not wanted:
+            wanted = {LIVE_GROUP}
+        for group in wanted - self.joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+        for group in self.joined - wanted:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.joined = wanted
@@ -0,0 +1,139 @@
+"""Background sender for live updates.
+
+Views hand updates to ``Dispatcher.enqueue`` (normally from
+``transaction.on_commit``) and return straight away. A task on the server's
+event loop drains the bounded queue in batches, lets ``process`` merge and
+number them, and awaits ``deliver`` for every resulting message, so the
+scorer's request never waits on the channel layer.
+
+The task has to run on the loop the sockets are served from: the in-memory
+channel layer wakes receivers on their own loop, and channels_redis ties its
+connections to one loop, so a group_send from a private loop is lost or
+broken. Consumers call ``start`` from their first async entry point. Until one
+has, this process serves no live viewers and ``enqueue`` sends each update
+itself, synchronously, for those connected to other workers.
+"""
+import asyncio
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+
+
+class Dispatcher:
+    """Bounded queue plus the asyncio task that empties it.
+
+    process(updates) -> messages is synchronous and runs in the loop's
+    executor; deliver(message) is a coroutine. When the queue is full,
+    "drop_oldest" discards the oldest queued update to make room and
+    "drop_newest" discards the incoming one.
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+    def __init__(self, process, deliver, window: float = 0, max_queue: int = 1000,
+                 batch_size: int = 100, overflow: str = "drop_oldest"):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}, not {overflow!r}")
+        self.process = process
+        self.deliver = deliver
+        self.window = window
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.loop = None
+        self.queue = None
+        self.lock = threading.Lock()
+        self.last_error = None
+        self.last_batch_at = None
+        self.counters = {
+            "enqueued": 0,
+            "dropped": 0,
+            "merged": 0,
+            "sent": 0,
+            "batches": 0,
+            "errors": 0,
+        }
+
+    def _running(self) -> bool:
+        return self.loop is not None and not self.loop.is_closed()
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """Run on loop, by default the running one; later calls are no-ops while it runs"""
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        with self.lock:
+            if self._running():
+                return
+            self.queue = asyncio.Queue(self.max_queue)
+            self.loop = loop
+            asyncio.run_coroutine_threadsafe(self._run(), loop)
+
+    def enqueue(self, update) -> None:
+        """Thread-safe; never blocks the caller once the dispatcher is started"""
+        if not self._running():
+            try:
+                self.start()
+            except RuntimeError:
+                # No loop in this thread, and no socket has started one
+                self._send_now(update)
+                return
+        self.loop.call_soon_threadsafe(self._put, update)
+
+    def _send_now(self, update) -> None:
+        self.counters["enqueued"] += 1
+        try:
+            messages = self.process([update])
+            for message in messages:
+                async_to_sync(self.deliver)(message)
+        except Exception as exc:
+            self.counters["errors"] += 1
+            self.last_error = repr(exc)
+            return
+        self.counters["batches"] += 1
+        self.counters["sent"] += len(messages)
+        self.last_batch_at = time.time()
+
+    def _put(self, update) -> None:
+        self.counters["enqueued"] += 1
+        if self.queue.full():
+            self.counters["dropped"] += 1
+            if self.overflow == "drop_newest":
+                return
+            self.queue.get_nowait()
+        self.queue.put_nowait(update)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            if self.window > 0:
+                # Give the rest of a burst time to arrive so it goes out merged
+                await asyncio.sleep(self.window)
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            try:
+                messages = await loop.run_in_executor(None, self.process, batch)
+                await asyncio.gather(*(self.deliver(message) for message in messages))
+            except Exception as exc:
+                self.counters["errors"] += 1
+                self.last_error = repr(exc)
+                continue
+            self.counters["batches"] += 1
+            self.counters["sent"] += len(messages)
+            self.counters["merged"] += len(batch) - len(messages)
+            self.last_batch_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running(),
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "window_ms": int(self.window * 1000),
+            "overflow": self.overflow,
+            **self.counters,
+            "last_batch_at": self.last_batch_at,
+            "last_error": self.last_error,
+        }
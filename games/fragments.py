@@ -0,0 +1,108 @@
+"""Cached rendered fragments of the public home page.
+
+Each live game card is cached under the game's resource version
+(games.versions) and the shared version of teams and players, so a score in
+one game re-renders that card only and the other cards, and the queries
+behind them, come from the cache. The upcoming list is cached under the ids
+and versions of the games in it. Old fragments are never read again and
+expire after FRAGMENT_CACHE_TIMEOUT seconds. ``live_card`` serves one card on
+its own, from the same entries, to live clients that have to redraw it.
+
+Only the public home page is cached this way: the dashboard and the scoring
+pages carry per-user CSRF tokens and must be rendered for each request.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import versions
+from .livecards import live_cards
+from .loaders import load_matches
+
+TIMEOUT = getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 600)
+
+# Counters of this worker since it started, served by /healthz/live/
+FRAGMENT_STATS = {
+    "renders": 0,
+    "hits": 0,
+    "misses": 0,
+}
+
+
+def fragment_stats() -> dict:
+    looked_up = FRAGMENT_STATS["hits"] + FRAGMENT_STATS["misses"]
+    return {
+        **FRAGMENT_STATS,
+        "hit_rate": round(FRAGMENT_STATS["hits"] / looked_up, 3) if looked_up else None,
+    }
+
+
+def _card_key(game_id, version: int, shared: int) -> str:
+    return f"fragment:live_card:{game_id}:{version}:{shared}"
+
+
+def _upcoming_key(games, game_versions: dict, shared: int) -> str:
+    parts = ",".join(f"{g.pk}:{game_versions[versions.game_scope(g.pk)]}" for g in games)
+    digest = hashlib.md5(parts.encode(), usedforsecurity=False).hexdigest()
+    return f"fragment:upcoming:{digest}:{shared}"
+
+
+def _render_cards(games: list, card_keys: dict) -> dict:
+    """{card key: card HTML} of games"""
+    if not games:
+        return {}
+    return {
+        card_keys[item["game"].pk]: render_to_string("games/home_live_card.html", {"item": item})
+        for item in live_cards(load_matches(games, active_players=False))
+    }
+
+
+def live_card(game) -> str:
+    """HTML of one live card, for live clients to swap in when a patch cannot be applied in place"""
+    game_versions = versions.current_many([versions.game_scope(game.pk), versions.SHARED])
+    key = _card_key(game.pk, game_versions[versions.game_scope(game.pk)], game_versions[versions.SHARED])
+    html = cache.get(key)
+    if html is None:
+        FRAGMENT_STATS["misses"] += 1
+        html = _render_cards([game], {game.pk: key})[key]
+        cache.set(key, html, TIMEOUT)
+    else:
+        FRAGMENT_STATS["hits"] += 1
+    return mark_safe(html)
+
+
+def home_fragments(live: list, upcoming: list) -> tuple:
+    """(live card HTML in order, upcoming list HTML, hits, fragments looked up)
+
+    live and upcoming are base Game rows with both teams selected; the cards
+    that miss are built by live_cards from their sport-specific rows.
+    """
+    game_versions = versions.current_many(
+        [versions.game_scope(g.pk) for g in live + upcoming] + [versions.SHARED]
+    )
+    shared = game_versions[versions.SHARED]
+    card_keys = {g.pk: _card_key(g.pk, game_versions[versions.game_scope(g.pk)], shared) for g in live}
+    upcoming_key = _upcoming_key(upcoming, game_versions, shared)
+    found = cache.get_many([*card_keys.values(), upcoming_key])
+
+    rendered = _render_cards([g for g in live if card_keys[g.pk] not in found], card_keys)
+    if upcoming_key not in found:
+        rendered[upcoming_key] = render_to_string("games/home_upcoming.html", {"upcoming": upcoming})
+    if rendered:
+        cache.set_many(rendered, TIMEOUT)
+
+    hits = len(found)
+    looked_up = len(card_keys) + 1
+    FRAGMENT_STATS["renders"] += 1
+    FRAGMENT_STATS["hits"] += hits
+    FRAGMENT_STATS["misses"] += looked_up - hits
+    html = {**found, **rendered}
+    return (
+        [mark_safe(html[card_keys[g.pk]]) for g in live],
+        mark_safe(html[upcoming_key]),
+        hits,
+        looked_up,
+    )
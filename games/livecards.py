@@ -0,0 +1,133 @@
+"""Live game cards of the public home page.
+
+``live_cards`` builds the card of every live game with a fixed number of
+queries, each covering all the live games at once: one for the player stats,
+one for the last football scoring events, one each for the latest basketball
+shots and fouls, and one for the basketball team shooting. The "latest n per
+game" reads rank rows with a ``ROW_NUMBER()`` window partitioned by game (and
+team), so 12 live games cost the same as one.
+"""
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .boxscore import team_shooting
+from .models import Basketball, BasketballFoul, BasketballShot, Cricket, PlayerStat, ScoreEvent
+
+
+def _latest(queryset, partition_by, count: int) -> list:
+    """The newest count rows of each partition"""
+    return list(
+        queryset.annotate(
+            recency=Window(RowNumber(), partition_by=[F(f) for f in partition_by], order_by=F('created_at').desc()),
+        ).filter(recency__lte=count).order_by('-created_at')
+    )
+
+
+def live_cards(games: list) -> list:
+    """Card context of each live game, built from load_matches rows"""
+    game_ids = [g.pk for g in games]
+    football_ids = [g.pk for g in games if g.sport == 'FOOTBALL']
+    basketball_ids = [g.pk for g in games if g.sport == 'BASKETBALL']
+
+    # Every player stat of the live games, best scorers first
+    stats = defaultdict(list)
+    stat_of = {}
+    if game_ids:
+        for stat in PlayerStat.objects.filter(game_id__in=game_ids).select_related('player').order_by('-points', 'player__name'):
+            stats[stat.game_id, stat.team_id].append(stat)
+            stat_of[stat.game_id, stat.player_id] = stat
+
+    last_scores = {}
+    if football_ids:
+        events = ScoreEvent.objects.filter(game_id__in=football_ids, sport='FOOTBALL', points__gt=0).select_related('player', 'team')
+        for event in _latest(events, ('game_id', 'team_id'), 1):
+            last_scores[event.game_id, event.team_id] = event
+
+    recent_shots, recent_fouls, shooting = defaultdict(list), defaultdict(list), {}
+    if basketball_ids:
+        shots = BasketballShot.objects.filter(game_id__in=basketball_ids).select_related('player', 'team')
+        for shot in _latest(shots, ('game_id',), 3):
+            recent_shots[shot.game_id].append(shot)
+        fouls = BasketballFoul.objects.filter(game_id__in=basketball_ids).select_related('player', 'team')
+        for foul in _latest(fouls, ('game_id',), 2):
+            recent_fouls[foul.game_id].append(foul)
+        shooting = team_shooting(basketball_ids)
+
+    cards = []
+    for g in games:
+        item = {"game": g}
+        if g.sport == "FOOTBALL":
+            t1_top = next(iter(stats[g.pk, g.team1_id]), None)
+            t2_top = next(iter(stats[g.pk, g.team2_id]), None)
+            t1_last = last_scores.get((g.pk, g.team1_id))
+            t2_last = last_scores.get((g.pk, g.team2_id))
+            t1_last_pts = None
+            t2_last_pts = None
+            if t1_last and t1_last.player_id:
+                ps = stat_of.get((g.pk, t1_last.player_id))
+                t1_last_pts = ps.points if ps else 0
+            if t2_last and t2_last.player_id:
+                ps = stat_of.get((g.pk, t2_last.player_id))
+                t2_last_pts = ps.points if ps else 0
+            item.update(
+                {
+                    "type": "football",
+                    "team1_score": g.team1_score,
+                    "team2_score": g.team2_score,
+                    "team1_top": t1_top,
+                    "team2_top": t2_top,
+                    "team1_last": t1_last,
+                    "team2_last": t2_last,
+                    "team1_last_pts": t1_last_pts,
+                    "team2_last_pts": t2_last_pts,
+                }
+            )
+        elif g.sport == "BASKETBALL":
+            no_shots = {'fg_percentage': 0}
+            item.update({
+                "type": "basketball",
+                "team1_score": g.team1_score,
+                "team2_score": g.team2_score,
+                "team1_players": stats[g.pk, g.team1_id],
+                "team2_players": stats[g.pk, g.team2_id],
+                "recent_shots": recent_shots[g.pk],
+                "recent_fouls": recent_fouls[g.pk],
+                "team1_fg_pct": round(shooting.get((g.pk, g.team1_id), no_shots)['fg_percentage'], 1),
+                "team2_fg_pct": round(shooting.get((g.pk, g.team2_id), no_shots)['fg_percentage'], 1),
+            })
+            if isinstance(g, Basketball):
+                item.update({
+                    "current_quarter": g.current_quarter,
+                    "time_remaining": g.time_remaining_seconds,
+                    "team1_fouls": g.team1_fouls_current_quarter,
+                    "team2_fouls": g.team2_fouls_current_quarter,
+                    "possession_team": g.possession_team,
+                    "overtime_periods": g.overtime_periods,
+                })
+        elif g.sport == "CRICKET" and isinstance(g, Cricket):
+            batting_team = g.team1 if g.batting_side == "TEAM1" else g.team2
+            team_runs = g.team1_score if g.batting_side == "TEAM1" else g.team2_score
+            batsman_runs = None
+            bowler_wkts = None
+            if g.current_batsman_id:
+                ps = stat_of.get((g.pk, g.current_batsman_id))
+                batsman_runs = ps.runs if ps else 0
+            if g.current_bowler_id:
+                psb = stat_of.get((g.pk, g.current_bowler_id))
+                bowler_wkts = psb.wickets if psb else 0
+            item.update(
+                {
+                    "type": "cricket",
+                    "batting_team": batting_team,
+                    "batting_side": g.batting_side,
+                    "team_runs": team_runs,
+                    "batsman": g.current_batsman,
+                    "batsman_runs": batsman_runs,
+                    "bowler": g.current_bowler,
+                    "bowler_wickets": bowler_wkts,
+                }
+            )
+        cards.append(item)
+    return cards
@@ -0,0 +1,68 @@
+"""Batched loading of match lists.
+
+``load_matches`` turns a list of base ``Game`` rows into their sport-specific
+rows (``Basketball``, ``Cricket``) with the related objects the match views
+read, in a constant number of queries however many matches there are: one per
+sport present, plus two for the basketball active players when asked for.
+``aload_matches`` does the same for async views, the sports side by side.
+"""
+from collections import defaultdict
+from functools import partial
+
+from django.db.models import prefetch_related_objects
+
+from . import parallel
+from .models import Basketball, Cricket
+
+# Football adds no columns to Game, so its rows are used as they are
+BATCHED_MODELS = {
+    "BASKETBALL": (Basketball, ("team1", "team2", "winner", "possession_team")),
+    "CRICKET": (Cricket, ("team1", "team2", "current_batsman", "current_bowler")),
+}
+
+ACTIVE_PLAYERS = ("team1_active_players", "team2_active_players")
+
+
+def _sport_ids(games) -> dict:
+    ids = defaultdict(list)
+    for game in games:
+        batched = BATCHED_MODELS.get(game.sport)
+        if batched and not isinstance(game, batched[0]):
+            ids[game.sport].append(game.pk)
+    return ids
+
+
+def _sport_rows(sport, pks) -> dict:
+    model, related = BATCHED_MODELS[sport]
+    return {row.pk: row for row in model.objects.filter(pk__in=pks).select_related(*related)}
+
+
+def _prefetch_active_players(games) -> None:
+    prefetch_related_objects([g for g in games if isinstance(g, Basketball)], *ACTIVE_PLAYERS)
+
+
+def load_matches(games, active_players: bool = True) -> list:
+    """games as sport-specific rows, in the same order, with active players prefetched"""
+    games = list(games)
+    rows = {}
+    for sport, pks in _sport_ids(games).items():
+        rows.update(_sport_rows(sport, pks))
+
+    games = [rows.get(game.pk, game) for game in games]
+    if active_players:
+        _prefetch_active_players(games)
+    return games
+
+
+async def aload_matches(games: list, active_players: bool = True) -> list:
+    """load_matches for an already evaluated list of games"""
+    rows = {}
+    for sport_rows in await parallel.gather(*(
+        partial(_sport_rows, sport, pks) for sport, pks in _sport_ids(games).items()
+    )):
+        rows.update(sport_rows)
+
+    games = [rows.get(game.pk, game) for game in games]
+    if active_players:
+        await parallel.run(_prefetch_active_players, games)
+    return games
@@ -0,0 +1,88 @@
+"""Serialization benchmark for the match list.
+
+Builds a /api/matches/ payload of --matches unsaved basketball games in memory
+(no database access) and times turning it into a response body with Django's
+JsonResponse (datetimes already isoformat()ted, as the views used to do while
+building the payload) against FastJsonResponse on the native payload. Reports
+the medians as JSON, tagged with the current git commit.
+
+    python manage.py bench_json --matches 5000 --repeat 20
+"""
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.utils import timezone
+
+from games import responses
+from games.models import Basketball, Player, Team
+from games.snapshots import GameSnapshot
+
+from .loadtest_live import _git_commit
+
+
+def _payload(count: int) -> dict:
+    now = timezone.now()
+    teams = [Team(id=i, name=f"Team {i}", logo=f"logos/team{i}.png") for i in range(1, 21)]
+    players = {t.id: [Player(id=t.id * 100 + n, name=f"Player {t.id}-{n}", team=t) for n in range(5)] for t in teams}
+    matches = []
+    for i in range(count):
+        team1, team2 = teams[i % 20], teams[(i + 7) % 20]
+        game = Basketball(
+            id=i + 1, sport="BASKETBALL", status="FINISHED", team1=team1, team2=team2,
+            team1_score=60 + i % 40, team2_score=55 + i % 45, winner=team1,
+            scheduled_time=now - timedelta(hours=i), created_at=now - timedelta(hours=i, minutes=5),
+            updated_at=now - timedelta(minutes=i), current_quarter=4,
+        )
+        matches.append(GameSnapshot(game).match_summary((players[team1.id], players[team2.id])))
+    return {"matches": matches, "next_cursor": None}
+
+
+def _isoformatted(value):
+    if isinstance(value, dict):
+        return {k: _isoformatted(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_isoformatted(v) for v in value]
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _median_ms(build, repeat: int) -> tuple:
+    samples, body = [], b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = build().content
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2), len(body)
+
+
+class Command(BaseCommand):
+    help = "Compare JsonResponse with FastJsonResponse on a large match list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--matches", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--output", help="Also write the report to this file")
+
+    def handle(self, *args, **options):
+        payload = _payload(options["matches"])
+        formatted = _isoformatted(payload)
+        baseline_ms, baseline_bytes = _median_ms(lambda: JsonResponse(formatted), options["repeat"])
+        fast_ms, fast_bytes = _median_ms(lambda: responses.FastJsonResponse(payload), options["repeat"])
+        report = {
+            "commit": _git_commit(),
+            "matches": options["matches"],
+            "repeat": options["repeat"],
+            "encoder": "orjson" if responses.orjson is not None else "json",
+            "jsonresponse": {"median_ms": baseline_ms, "bytes": baseline_bytes},
+            "fastjsonresponse": {"median_ms": fast_ms, "bytes": fast_bytes},
+            "saved_ms": round(baseline_ms - fast_ms, 2),
+            "speedup": round(baseline_ms / fast_ms, 1) if fast_ms else None,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
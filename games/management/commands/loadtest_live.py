@@ -0,0 +1,251 @@
+"""Fan-out load test for the live feed.
+
+Opens N in-process WebSocket clients against the ASGI app from bgsc/asgi.py,
+feeds a scripted stream of scoring updates through the live dispatcher and
+reports end-to-end latency (publish to decoded frame), throughput and memory
+as JSON, tagged with the current git commit so runs can be compared. Memory
+is the current RSS before and after connecting (from psutil when installed,
+else /proc/self/statm; null elsewhere) and the process's peak RSS.
+
+    python manage.py loadtest_live --clients 5000 --events 300 --rate 20
+    python manage.py loadtest_live --layer redis --protocol msgpack --output run.json
+
+The updates go straight to the dispatcher rather than through the scoring
+views, so no rows are written; they use game ids from --first-game-id up,
+whose sequence counters and replay rings land in the configured cache.
+Before the run, one update is queued from a worker thread, the way a scoring
+view's on_commit does, and the command fails unless a connected socket
+receives it.
+"""
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer, channel_layers
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from games import broadcast, codecs
+from games.consumers import feed_stats
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROTOCOLS = {
+    "json": None,
+    "cjson": codecs.COMPACT_JSON,
+    "msgpack": codecs.MSGPACK,
+}
+
+
+def _rss_mb() -> float | None:
+    """Current resident set size of this process, or None where it cannot be read"""
+    if psutil is not None:
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB on Linux and the BSDs
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentiles(samples: list) -> dict:
+    if len(samples) < 2:
+        return {"p50": None, "p95": None, "p99": None, "max": max(samples, default=None)}
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        "p50": round(cuts[49], 2),
+        "p95": round(cuts[94], 2),
+        "p99": round(cuts[98], 2),
+        "max": round(max(samples), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure live feed fan-out latency and throughput with simulated WebSocket clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--games", type=int, default=1, help="Games the clients are spread over")
+        parser.add_argument("--events", type=int, default=200, help="Scoring updates to publish")
+        parser.add_argument("--rate", type=float, default=20, help="Updates per second")
+        parser.add_argument("--layer", choices=["memory", "redis"], default="memory",
+                            help="In-memory channel layer, or the one in CHANNEL_LAYERS")
+        parser.add_argument("--protocol", choices=sorted(PROTOCOLS), default="json")
+        parser.add_argument("--first-game-id", type=int, default=900000)
+        parser.add_argument("--drain-timeout", type=float, default=30,
+                            help="Seconds to wait for the last frames after publishing")
+        parser.add_argument("--output", help="Also write the report to this file")
+
+    def handle(self, *args, **options):
+        if options["protocol"] == "msgpack" and codecs.msgpack is None:
+            self.stderr.write("msgpack is not installed")
+            return
+        if options["layer"] == "memory":
+            channel_layers.backends["default"] = InMemoryChannelLayer(capacity=10000)
+
+        report = asyncio.run(self._run(options))
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+    async def _run(self, options):
+        from bgsc.asgi import application
+
+        protocol = PROTOCOLS[options["protocol"]]
+        game_ids = [options["first_game_id"] + i for i in range(options["games"])]
+        rss_before = _rss_mb()
+
+        clients = []
+        connect_started = time.perf_counter()
+        for i in range(options["clients"]):
+            game_id = game_ids[i % len(game_ids)]
+            client = WebsocketCommunicator(
+                application, f"/ws/live/?games={game_id}",
+                subprotocols=[protocol] if protocol else None,
+            )
+            connected, _ = await client.connect(timeout=10)
+            if not connected:
+                raise RuntimeError(f"client {i} was refused")
+            clients.append(client)
+        connect_seconds = time.perf_counter() - connect_started
+        rss_connected = _rss_mb()
+        await self._check_delivery(clients[0], game_ids[0], protocol)
+
+        latencies = []
+        frames = {"received": 0, "bytes": 0}
+        expected = options["events"] * options["clients"] // len(game_ids)
+        done = asyncio.Event()
+
+        async def read(client):
+            while True:
+                output = await client.output_queue.get()
+                if output.get("type") != "websocket.send":
+                    continue
+                received = time.time()
+                text, data = output.get("text"), output.get("bytes")
+                frames["received"] += 1
+                frames["bytes"] += len(data) if data is not None else len(text.encode())
+                message = codecs.decode(text, data, protocol)
+                if "keys" in message:
+                    continue
+                events = message.get("events", message.get(codecs.KEYS["events"], []))
+                for event in events:
+                    if "t" in event:
+                        latencies.append((received - event["t"]) * 1000)
+                if len(latencies) >= expected:
+                    done.set()
+
+        readers = [asyncio.create_task(read(client)) for client in clients]
+        # Connect-time frames (key dictionary) are not part of the run
+        await asyncio.sleep(0.1)
+        frames.update(received=0, bytes=0)
+
+        interval = 1 / options["rate"] if options["rate"] > 0 else 0
+        publish_started = time.perf_counter()
+        for n in range(options["events"]):
+            game_id = game_ids[n % len(game_ids)]
+            broadcast.dispatcher.enqueue({
+                "game_id": game_id,
+                "sport": "BASKETBALL",
+                "kind": "shot",
+                "state": {"status": "LIVE", "team1_score": 2 * n, "team2_score": n},
+                "events": [{"kind": "shot", "t": time.time()}],
+            })
+            if interval:
+                await asyncio.sleep(interval)
+        try:
+            await asyncio.wait_for(done.wait(), options["drain_timeout"])
+        except asyncio.TimeoutError:
+            pass
+        run_seconds = time.perf_counter() - publish_started
+
+        for reader in readers:
+            reader.cancel()
+        for client in clients:
+            await client.disconnect()
+
+        return {
+            "commit": _git_commit(),
+            "clients": options["clients"],
+            "games": len(game_ids),
+            "events": options["events"],
+            "rate": options["rate"],
+            "layer": options["layer"],
+            "protocol": options["protocol"],
+            "coalesce_window_ms": int(broadcast.COALESCE_WINDOW * 1000),
+            "connect_seconds": round(connect_seconds, 2),
+            "run_seconds": round(run_seconds, 2),
+            "deliveries": {
+                "expected": expected,
+                "received": len(latencies),
+                "frames": frames["received"],
+                "frames_per_second": round(frames["received"] / run_seconds, 1),
+                "bytes": frames["bytes"],
+            },
+            "latency_ms": _percentiles(latencies),
+            "memory_mb": {
+                "rss_start": rss_before,
+                "rss_connected": rss_connected,
+                "rss_end": _rss_mb(),
+                "rss_peak": _peak_rss_mb(),
+                "per_client_kb": (
+                    round((rss_connected - rss_before) * 1024 / options["clients"], 1)
+                    if rss_before is not None and rss_connected is not None else None
+                ),
+            },
+            "dispatcher": broadcast.dispatcher.stats(),
+            "feed": feed_stats(),
+        }
+
+    async def _check_delivery(self, client, game_id, protocol):
+        """Fail unless an update queued off the loop reaches a connected socket"""
+        await sync_to_async(broadcast.dispatcher.enqueue, thread_sensitive=False)({
+            "game_id": game_id,
+            "sport": "BASKETBALL",
+            "kind": "check",
+            "state": {"status": "LIVE"},
+            "events": [{"kind": "check"}],
+        })
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                output = await asyncio.wait_for(client.output_queue.get(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            if output.get("type") != "websocket.send":
+                continue
+            message = codecs.decode(output.get("text"), output.get("bytes"), protocol)
+            events = message.get("events", message.get(codecs.KEYS["events"], []))
+            if any(event.get("kind", event.get(codecs.KEYS["kind"])) == "check" for event in events):
+                return
+        raise CommandError(f"a connected socket did not receive the check update for game {game_id}")
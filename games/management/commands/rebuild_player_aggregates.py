@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from games import aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute the basketball player aggregates from every PlayerStat and BasketballShot"
+
+    def handle(self, *args, **options):
+        count = aggregates.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt aggregates for {count} players"))
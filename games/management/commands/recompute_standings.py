@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from games import standings
+from games.models import Team, TeamStanding
+
+
+class Command(BaseCommand):
+    help = "Recompute the basketball standings from every finished game, or check the table against them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report teams whose stored standing differs; exit with an error if any do",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            count = standings.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Recomputed standings for {count} teams"))
+            return
+
+        expected, _ = standings.totals()
+        stored = {
+            row.team_id: {field: getattr(row, field) for field in standings.FIELDS}
+            for row in TeamStanding.objects.all()
+        }
+        empty = dict.fromkeys(standings.FIELDS, 0)
+        names = dict(Team.objects.values_list("id", "name"))
+        mismatched = 0
+        for team_id in sorted(expected.keys() | stored.keys()):
+            want, have = expected.get(team_id, empty), stored.get(team_id, empty)
+            if want != have:
+                mismatched += 1
+                diff = ", ".join(f"{f}: {have[f]} != {want[f]}" for f in standings.FIELDS if have[f] != want[f])
+                self.stdout.write(f"{names.get(team_id, team_id)}: {diff}")
+        if mismatched:
+            raise CommandError(f"{mismatched} teams differ from a full recompute")
+        self.stdout.write(self.style.SUCCESS("Standings match a full recompute"))
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_basketball_team1_active_players_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['created_at', 'id'], name='games_game_created_83947f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='games_game_status_4503fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['sport', 'status', 'created_at', 'id'], name='games_game_sport_3f09d8_idx'),
+        ),
+    ]
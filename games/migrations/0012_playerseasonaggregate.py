@@ -0,0 +1,75 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# Made shot type -> (aggregate column, points), as of this migration
+SHOT_COLUMNS = {
+    '3PT': ('total_3pt', 3),
+    '2PT': ('total_2pt', 2),
+    'FT': ('total_1pt', 1),
+}
+
+
+def build_aggregates(apps, schema_editor):
+    PlayerStat = apps.get_model('games', 'PlayerStat')
+    BasketballShot = apps.get_model('games', 'BasketballShot')
+    Aggregate = apps.get_model('games', 'PlayerSeasonAggregate')
+    rows = {}
+
+    def row(player_id, team_id):
+        return rows.setdefault(player_id, {
+            'player_id': player_id,
+            'team_id': team_id,
+            'total_matches': 0,
+            'total_3pt': 0,
+            'total_2pt': 0,
+            'total_1pt': 0,
+            'total_points': 0,
+        })
+
+    matches = (
+        PlayerStat.objects.filter(game__sport='BASKETBALL')
+        .values('player_id').annotate(matches=Count('id'), team_id=Min('team_id'))
+    )
+    for m in matches:
+        row(m['player_id'], m['team_id'])['total_matches'] = m['matches']
+
+    made = (
+        BasketballShot.objects.filter(result='MADE', shot_type__in=SHOT_COLUMNS)
+        .values('player_id', 'shot_type').annotate(made=Count('id'), team_id=Min('team_id'))
+    )
+    for m in made:
+        column, points = SHOT_COLUMNS[m['shot_type']]
+        r = row(m['player_id'], m['team_id'])
+        r[column] += m['made'] * points
+        r['total_points'] += m['made'] * points
+    Aggregate.objects.bulk_create(Aggregate(**r) for r in rows.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0011_game_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerSeasonAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_matches', models.PositiveIntegerField(default=0)),
+                ('total_3pt', models.PositiveIntegerField(default=0)),
+                ('total_2pt', models.PositiveIntegerField(default=0)),
+                ('total_1pt', models.PositiveIntegerField(default=0)),
+                ('total_points', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='season_aggregate', to='games.player')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_aggregates', to='games.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['total_points', 'player'], name='games_playe_total_p_0da5be_idx')],
+            },
+        ),
+        migrations.RunPython(build_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FIELDS = ('matches_played', 'wins', 'losses', 'points_scored', 'points_conceded', 'points')
+
+
+def build_standings(apps, schema_editor):
+    Basketball = apps.get_model('games', 'Basketball')
+    TeamStanding = apps.get_model('games', 'TeamStanding')
+    StandingContribution = apps.get_model('games', 'StandingContribution')
+    standings, contributions = {}, []
+    for game in Basketball.objects.filter(status='FINISHED'):
+        contributions.append(StandingContribution(
+            game_id=game.pk,
+            team1_id=game.team1_id,
+            team2_id=game.team2_id,
+            team1_score=game.team1_score,
+            team2_score=game.team2_score,
+            winner_id=game.winner_id,
+        ))
+        for team_id, scored, conceded in (
+            (game.team1_id, game.team1_score, game.team2_score),
+            (game.team2_id, game.team2_score, game.team1_score),
+        ):
+            row = standings.setdefault(team_id, dict.fromkeys(FIELDS, 0))
+            row['matches_played'] += 1
+            row['points_scored'] += scored
+            row['points_conceded'] += conceded
+            if game.winner_id == team_id:
+                row['wins'] += 1
+                row['points'] += 1
+            elif game.winner_id:
+                row['losses'] += 1
+    TeamStanding.objects.bulk_create(TeamStanding(team_id=team_id, **row) for team_id, row in standings.items())
+    StandingContribution.objects.bulk_create(contributions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0012_playerseasonaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matches_played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('points_scored', models.PositiveIntegerField(default=0)),
+                ('points_conceded', models.PositiveIntegerField(default=0)),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing', to='games.team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StandingContribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team1_score', models.PositiveIntegerField()),
+                ('team2_score', models.PositiveIntegerField()),
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing_contribution', to='games.basketball')),
+                ('team1', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='games.team')),
+                ('team2', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='games.team')),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='games.team')),
+            ],
+        ),
+        migrations.RunPython(build_standings, migrations.RunPython.noop),
+    ]
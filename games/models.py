@@ -25,6 +25,14 @@ class Game(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Keyset pagination of /api/matches/, newest first, optionally filtered
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["status", "created_at", "id"]),
+            models.Index(fields=["sport", "status", "created_at", "id"]),
+        ]
+
     def save(self, *args, **kwargs):
         self.team1_score = max(0, self.team1_score or 0)
         self.team2_score = max(0, self.team2_score or 0)
@@ -334,6 +342,54 @@ class BasketballTimeout(models.Model):
         return f"{team_name} - {self.timeout_type} Q{self.quarter}"
 
 
+class PlayerSeasonAggregate(models.Model):
+    """Running basketball totals per player, kept up to date by games.aggregates"""
+    player = models.OneToOneField(Player, related_name='season_aggregate', on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, related_name='player_aggregates', on_delete=models.CASCADE)
+    total_matches = models.PositiveIntegerField(default=0)
+    total_3pt = models.PositiveIntegerField(default=0)
+    total_2pt = models.PositiveIntegerField(default=0)
+    total_1pt = models.PositiveIntegerField(default=0)
+    total_points = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['total_points', 'player']),
+        ]
+
+    def __str__(self):
+        return f"{self.player.name}: {self.total_points} pts in {self.total_matches} matches"
+
+
+class TeamStanding(models.Model):
+    """Basketball points table row, kept up to date by games.standings"""
+    team = models.OneToOneField(Team, related_name='standing', on_delete=models.CASCADE)
+    matches_played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    points_scored = models.PositiveIntegerField(default=0)
+    points_conceded = models.PositiveIntegerField(default=0)
+    points = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.team.name}: {self.points} pts from {self.matches_played} matches"
+
+
+class StandingContribution(models.Model):
+    """The finished result of a game as currently counted in TeamStanding"""
+    game = models.OneToOneField(Basketball, related_name='standing_contribution', on_delete=models.CASCADE)
+    team1 = models.ForeignKey(Team, related_name='+', on_delete=models.CASCADE)
+    team2 = models.ForeignKey(Team, related_name='+', on_delete=models.CASCADE)
+    team1_score = models.PositiveIntegerField()
+    team2_score = models.PositiveIntegerField()
+    winner = models.ForeignKey(Team, related_name='+', on_delete=models.CASCADE, null=True, blank=True)
+
+    def __str__(self):
+        return f"Game {self.game_id}: {self.team1_score}-{self.team2_score}"
+
+
 class APIAnalytics(models.Model):
     """Track API endpoint usage for frontend analytics"""
     endpoint = models.CharField(max_length=255, db_index=True)
@@ -0,0 +1,72 @@
+"""Keyset pagination for game lists.
+
+Pages are ordered newest first on ``(created_at, id)``, which the Game indexes
+cover, and continue from an opaque cursor holding the last row's key, so every
+page costs the same however far into the history it is. ``pack`` / ``unpack``
+make such cursors for other keys too (see games.timeline).
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidPage(ValueError):
+    """Malformed cursor or limit"""
+
+
+def pack(created_at, *rest) -> str:
+    """Opaque cursor for a sort key starting with a datetime"""
+    key = json.dumps([created_at.isoformat(), *rest])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def unpack(cursor: str, size: int) -> list:
+    """The sort key packed into cursor; InvalidPage unless it has size parts"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = parse_datetime(key[0])
+    except (ValueError, TypeError, IndexError, KeyError):
+        raise InvalidPage("invalid cursor")
+    if created_at is None or len(key) != size:
+        raise InvalidPage("invalid cursor")
+    return [created_at, *key[1:]]
+
+
+def encode_cursor(game) -> str:
+    return pack(game.created_at, game.id)
+
+
+def decode_cursor(cursor: str):
+    created_at, game_id = unpack(cursor, 2)
+    if not isinstance(game_id, int):
+        raise InvalidPage("invalid cursor")
+    return created_at, game_id
+
+
+def parse_limit(value) -> int:
+    if value in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidPage("limit must be an integer")
+    if limit < 1:
+        raise InvalidPage("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def paginate(queryset, cursor: str | None = None, limit: int = DEFAULT_LIMIT):
+    """(rows, next_cursor) for the page of queryset after cursor, newest first"""
+    if cursor:
+        created_at, game_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=game_id))
+    rows = list(queryset.order_by("-created_at", "-id")[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
@@ -0,0 +1,53 @@
+"""Independent ORM reads of an async view, run side by side.
+
+Django's async ORM methods (``aget``, ``async for`` ...) all hop onto the one
+thread-sensitive worker, so ``asyncio.gather`` over them still runs the
+queries one after the other. ``gather`` instead runs each plain, synchronous
+callable in its own pool thread, on that thread's own database connection,
+and awaits them together. Keep everything that touches the database,
+including lazy related objects, inside the callables.
+
+The threads come from a pool of their own, ``PARALLEL_READ_WORKERS`` strong.
+Each thread keeps its connection open for up to CONN_MAX_AGE, so the pool size
+bounds how many database connections these reads hold. Each callable also
+reads outside any transaction shared with the others, so the sections of one
+response can come from slightly different moments: a write landing between two
+of them shows up in one but not the other. That is acceptable for the live
+views using this, which are refreshed seconds later; anything that must be
+consistent has to be read by a single callable.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_readers = ThreadPoolExecutor(
+    max_workers=getattr(settings, "PARALLEL_READ_WORKERS", 4), thread_name_prefix="parallel-read",
+)
+
+
+def isolated(call):
+    """call wrapped to release its thread's database connection like a request would"""
+    def wrapped():
+        try:
+            return call()
+        finally:
+            # As on request_finished: drop the connection once it is past
+            # CONN_MAX_AGE or broken
+            close_old_connections()
+    return wrapped
+
+
+async def run(call, *args, **kwargs):
+    """Result of call(*args, **kwargs) in a pool thread"""
+    return await sync_to_async(
+        isolated(partial(call, *args, **kwargs)), thread_sensitive=False, executor=_readers,
+    )()
+
+
+async def gather(*calls) -> list:
+    """Results of the zero-argument callables, run concurrently and in order"""
+    return list(await asyncio.gather(*(run(call) for call in calls)))
@@ -0,0 +1,50 @@
+"""JSON responses for the public API.
+
+``FastJsonResponse`` is a drop-in for ``JsonResponse`` that encodes with
+``orjson`` when it is installed and falls back to the standard library
+otherwise. Both paths write datetimes as ISO 8601 the way ``isoformat()``
+does, so payloads can carry ``datetime`` values as they are.
+``FastJsonResponse.encoded`` serves a body that has already been encoded
+(for instance one kept in the cache) without touching it again.
+"""
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _Encoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts datetimes to milliseconds; keep what orjson writes
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def dumps(data) -> bytes:
+    """data as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_Encoder().default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=_Encoder, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse encoded by dumps"""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
+
+    @classmethod
+    def encoded(cls, body: bytes, **kwargs) -> HttpResponse:
+        """Response for a body already produced by dumps"""
+        kwargs.setdefault("content_type", "application/json")
+        return HttpResponse(body, **kwargs)
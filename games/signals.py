@@ -0,0 +1,94 @@
+"""Signal handlers keeping derived data in step with game writes.
+
+Resource versions (games.versions) are bumped whenever game data changes, and
+the basketball player aggregates (games.aggregates) follow shots and stats, and
+a deleted basketball game is taken out of the standings (games.standings).
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from . import aggregates, standings, versions
+from .models import (
+    Basketball, BasketballFoul, BasketballShot, BasketballStop, BasketballSubstitution,
+    BasketballTimeout, BasketballViolation, Game, Player, PlayerStat, ScoreEvent, Team,
+)
+
+# Rows belonging to one game, through their game foreign key
+GAME_MODELS = (
+    PlayerStat, ScoreEvent, BasketballShot, BasketballViolation, BasketballFoul,
+    BasketballSubstitution, BasketballStop, BasketballTimeout,
+)
+
+# Rows shown across games (names, logos, rosters)
+SHARED_MODELS = (Team, Player)
+
+
+def _bump_on_commit(*scopes):
+    # Bumping before commit would let a reader tag the old data with the new version
+    transaction.on_commit(partial(versions.bump, *scopes))
+
+
+def game_changed(sender, instance, **kwargs):
+    _bump_on_commit(versions.game_scope(instance.pk), versions.ALL)
+
+
+def game_row_changed(sender, instance, **kwargs):
+    _bump_on_commit(versions.game_scope(instance.game_id), versions.ALL)
+
+
+def shared_row_changed(sender, instance, **kwargs):
+    _bump_on_commit(versions.SHARED, versions.ALL)
+
+
+def active_players_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    # Changed from the player side, pk_set holds the games
+    game_ids = (pk_set or ()) if reverse else (instance.pk,)
+    _bump_on_commit(*(versions.game_scope(game_id) for game_id in game_ids), versions.ALL)
+
+
+def shot_saved(sender, instance, created, **kwargs):
+    # Shots are never edited, only recorded and undone
+    if created:
+        aggregates.shot_changed(instance, 1)
+
+
+def shot_deleted(sender, instance, **kwargs):
+    aggregates.shot_changed(instance, -1)
+
+
+def stat_saved(sender, instance, created, **kwargs):
+    if created:
+        aggregates.stat_changed(instance, 1)
+
+
+def stat_deleted(sender, instance, **kwargs):
+    aggregates.stat_changed(instance, -1)
+
+
+def basketball_deleting(sender, instance, **kwargs):
+    standings.revert(instance.pk)
+
+
+def connect():
+    # Subclass saves (Basketball, ...) are sent with the subclass as sender
+    for model in (Game, *Game.__subclasses__()):
+        post_save.connect(game_changed, sender=model, dispatch_uid=f"versions.{model.__name__}.save")
+        post_delete.connect(game_changed, sender=model, dispatch_uid=f"versions.{model.__name__}.delete")
+    for model in GAME_MODELS:
+        post_save.connect(game_row_changed, sender=model, dispatch_uid=f"versions.{model.__name__}.save")
+        post_delete.connect(game_row_changed, sender=model, dispatch_uid=f"versions.{model.__name__}.delete")
+    for model in SHARED_MODELS:
+        post_save.connect(shared_row_changed, sender=model, dispatch_uid=f"versions.{model.__name__}.save")
+        post_delete.connect(shared_row_changed, sender=model, dispatch_uid=f"versions.{model.__name__}.delete")
+    for through in (Basketball.team1_active_players.through, Basketball.team2_active_players.through):
+        m2m_changed.connect(active_players_changed, sender=through, dispatch_uid=f"versions.{through.__name__}")
+
+    post_save.connect(shot_saved, sender=BasketballShot, dispatch_uid="aggregates.shot.save")
+    post_delete.connect(shot_deleted, sender=BasketballShot, dispatch_uid="aggregates.shot.delete")
+    post_save.connect(stat_saved, sender=PlayerStat, dispatch_uid="aggregates.stat.save")
+    post_delete.connect(stat_deleted, sender=PlayerStat, dispatch_uid="aggregates.stat.delete")
+    pre_delete.connect(basketball_deleting, sender=Basketball, dispatch_uid="standings.basketball.delete")
@@ -0,0 +1,197 @@
+"""Canonical serialization of a game's current state.
+
+``GameSnapshot`` wraps the sport-specific row a view already has in memory
+(``Basketball``, ``Cricket`` or ``Football``) and is the one place the live
+payloads are shaped: WebSocket patches and snapshots (``state``), the live API
+(``live_update``), the match list (``match_summary``) and the batch endpoint
+(``compact``).
+
+The last state pushed to live clients is kept per game in the default cache
+(``remember`` / ``last``), so reconnecting sockets are served without touching
+the database.
+"""
+from django.core.cache import cache
+
+from .models import Basketball, Cricket, Football, Game
+
+STATE_TIMEOUT = 60 * 60 * 12
+
+SPORT_MODELS = {
+    "BASKETBALL": Basketball,
+    "CRICKET": Cricket,
+    "FOOTBALL": Football,
+}
+
+
+# Field groups of GameSnapshot.compact and the state keys behind them; fields
+# that do not apply to a game's sport are left out
+BATCH_FIELDS = {
+    'status': ('status',),
+    'score': ('team1_score', 'team2_score'),
+    'teams': (),
+    'scheduled_time': (),
+    'quarter': ('current_quarter',),
+    'fouls': ('team1_fouls', 'team2_fouls'),
+    'batting': ('batting_side', 'team1_deaths', 'team2_deaths'),
+    'winner': ('winner',),
+}
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _team(team):
+    return {
+        'id': team.id,
+        'name': team.name,
+        'logo': team.logo,
+    } if team else None
+
+
+def _players(players):
+    return [{'id': p.id, 'name': p.name} for p in players]
+
+
+def concrete(game: Game) -> Game:
+    """The sport-specific row for game; costs a query only when given a plain Game"""
+    model = SPORT_MODELS.get(game.sport)
+    if model is None or isinstance(game, model):
+        return game
+    try:
+        return model.objects.select_related('team1', 'team2').get(pk=game.pk)
+    except model.DoesNotExist:
+        return game
+
+
+class GameSnapshot:
+    """Current state of one game, built without further queries"""
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.basketball = game if isinstance(game, Basketball) else None
+        self.cricket = game if isinstance(game, Cricket) else None
+
+    @classmethod
+    def of(cls, game: Game) -> "GameSnapshot":
+        return cls(concrete(game))
+
+    @property
+    def winner(self):
+        # Only basketball records a winner
+        return self.basketball.winner if self.basketball else None
+
+    def state(self) -> dict:
+        """Live state carried by WebSocket snapshots and diffed into patches"""
+        game = self.game
+        state = {
+            "status": game.status,
+            "team1_score": game.team1_score,
+            "team2_score": game.team2_score,
+        }
+        if self.basketball:
+            state.update({
+                "current_quarter": self.basketball.current_quarter,
+                "team1_fouls": self.basketball.team1_fouls_current_quarter,
+                "team2_fouls": self.basketball.team2_fouls_current_quarter,
+                "actual_start_time": _iso(self.basketball.actual_start_time),
+            })
+        elif self.cricket:
+            state.update({
+                "batting_side": self.cricket.batting_side,
+                "team1_deaths": self.cricket.team1_deaths,
+                "team2_deaths": self.cricket.team2_deaths,
+            })
+
+        winner = self.winner if game.status == "FINISHED" else None
+        if winner:
+            state["winner"] = {
+                "id": winner.id,
+                "name": winner.name
+            }
+        return state
+
+    def compact(self, fields) -> dict:
+        """id, sport and the requested groups of BATCH_FIELDS, for scoreboards and tickers"""
+        game = self.game
+        state = self.state()
+        data = {'id': game.id, 'sport': game.sport}
+        for field in fields:
+            if field == 'teams':
+                data['team1'] = _team(game.team1)
+                data['team2'] = _team(game.team2)
+            elif field == 'scheduled_time':
+                data['scheduled_time'] = game.scheduled_time
+            else:
+                data.update((key, state[key]) for key in BATCH_FIELDS[field] if key in state)
+        return data
+
+    def live_update(self) -> dict:
+        """Game fields of /api/basketball/<id>/live/"""
+        game = self.basketball
+        return {
+            'game_id': game.id,
+            'status': game.status,
+            'quarter': game.current_quarter,
+            'team1_score': game.team1_score,
+            'team2_score': game.team2_score,
+            'team1_fouls': game.team1_fouls_current_quarter,
+            'team2_fouls': game.team2_fouls_current_quarter,
+        }
+
+    def match_summary(self, active_players=None) -> dict:
+        """One entry of /api/matches/ (datetimes are left to FastJsonResponse).
+
+        active_players is a (team1, team2) pair of player lists; when omitted
+        for a basketball game they are read from the database.
+        """
+        game = self.game
+        winner = self.winner
+        data = {
+            'id': game.id,
+            'sport': game.sport,
+            'status': game.status,
+            'scheduled_time': game.scheduled_time,
+            'team1': _team(game.team1),
+            'team2': _team(game.team2),
+            'team1_score': game.team1_score,
+            'team2_score': game.team2_score,
+            'winner': {
+                'id': winner.id,
+                'name': winner.name
+            } if winner else None,
+            'created_at': game.created_at,
+            'updated_at': game.updated_at,
+        }
+
+        if self.basketball:
+            if active_players is None:
+                active_players = (self.basketball.get_team1_active_players(), self.basketball.get_team2_active_players())
+            data['basketball_details'] = {
+                'current_quarter': self.basketball.current_quarter,
+                'team1_fouls': self.basketball.team1_fouls_current_quarter,
+                'team2_fouls': self.basketball.team2_fouls_current_quarter,
+                'active_players': {
+                    'team1': _players(active_players[0]),
+                    'team2': _players(active_players[1]),
+                }
+            }
+        return data
+
+
+def _state_key(game_id) -> str:
+    return f"live:state:{game_id}"
+
+
+def remember(game_id, seq: int, state: dict) -> None:
+    """Record state as the last one pushed to live clients, numbered seq"""
+    cache.set(_state_key(game_id), {"seq": seq, "state": state}, STATE_TIMEOUT)
+
+
+def remember_if_missing(game_id, seq: int, state: dict) -> None:
+    cache.add(_state_key(game_id), {"seq": seq, "state": state}, STATE_TIMEOUT)
+
+
+def last(game_id) -> dict | None:
+    """{"seq", "state"} last pushed to live clients for game_id, if still cached"""
+    return cache.get(_state_key(game_id))
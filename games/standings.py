@@ -0,0 +1,138 @@
+"""Basketball points table (``TeamStanding``), maintained per game.
+
+A finished game contributes one match to both teams, its scores to their
+points scored and conceded, and a win (one point) and a loss when it has a
+winner. ``StandingContribution`` records exactly what was added for each game,
+so ``sync`` can take it off again before adding the current result when a
+game is reopened or its result corrected, and ``revert`` when it is deleted.
+
+``totals`` recomputes everything from the finished games;
+``manage.py recompute_standings`` compares or replaces the table with it.
+
+The table is changed with ``update()``, which sends no signals, so every
+change bumps the global version (games.versions) itself once it commits.
+Otherwise a standings response cached between the game's save and the sync
+would be served as current until it expired.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+
+from . import versions
+from .models import Basketball, StandingContribution, TeamStanding
+
+FIELDS = ("matches_played", "wins", "losses", "points_scored", "points_conceded", "points")
+
+
+def contribution(game) -> dict | None:
+    """What game adds to the table in its current state"""
+    if game.status != "FINISHED":
+        return None
+    return {
+        "team1_id": game.team1_id,
+        "team2_id": game.team2_id,
+        "team1_score": game.team1_score,
+        "team2_score": game.team2_score,
+        "winner_id": game.winner_id,
+    }
+
+
+def deltas(c: dict) -> dict:
+    """{team_id: {field: amount}} for one contribution"""
+    rows = {}
+    for team_id, scored, conceded in (
+        (c["team1_id"], c["team1_score"], c["team2_score"]),
+        (c["team2_id"], c["team2_score"], c["team1_score"]),
+    ):
+        row = rows.setdefault(team_id, dict.fromkeys(FIELDS, 0))
+        row["matches_played"] += 1
+        row["points_scored"] += scored
+        row["points_conceded"] += conceded
+    if c["winner_id"]:
+        loser_id = c["team2_id"] if c["winner_id"] == c["team1_id"] else c["team1_id"]
+        rows.setdefault(c["winner_id"], dict.fromkeys(FIELDS, 0))
+        rows[c["winner_id"]]["wins"] += 1
+        rows[c["winner_id"]]["points"] += 1
+        rows[loser_id]["losses"] += 1
+    return rows
+
+
+def _changed() -> None:
+    transaction.on_commit(partial(versions.bump, versions.ALL))
+
+
+def _shift(c: dict, sign: int) -> None:
+    for team_id, row in deltas(c).items():
+        if sign > 0:
+            TeamStanding.objects.get_or_create(team_id=team_id)
+        TeamStanding.objects.filter(team_id=team_id).update(
+            **{field: F(field) + sign * amount for field, amount in row.items() if amount}
+        )
+
+
+def _applied(record: StandingContribution | None) -> dict | None:
+    if record is None:
+        return None
+    return {
+        "team1_id": record.team1_id,
+        "team2_id": record.team2_id,
+        "team1_score": record.team1_score,
+        "team2_score": record.team2_score,
+        "winner_id": record.winner_id,
+    }
+
+
+@transaction.atomic
+def sync(game: Basketball) -> None:
+    """Make the table count game's current result (or nothing, unless FINISHED)"""
+    # Serializes syncs of one game so a result is never added twice
+    Basketball.objects.select_for_update().filter(pk=game.pk).exists()
+    record = StandingContribution.objects.filter(game_id=game.pk).first()
+    applied, wanted = _applied(record), contribution(game)
+    if applied == wanted:
+        return
+    if applied:
+        _shift(applied, -1)
+    if wanted:
+        _shift(wanted, 1)
+        StandingContribution.objects.update_or_create(game_id=game.pk, defaults=wanted)
+    else:
+        record.delete()
+    _changed()
+
+
+@transaction.atomic
+def revert(game_id) -> None:
+    """Take a game that is being deleted out of the table"""
+    record = StandingContribution.objects.select_for_update().filter(game_id=game_id).first()
+    if record:
+        _shift(_applied(record), -1)
+        record.delete()
+        _changed()
+
+
+def totals() -> tuple:
+    """({team_id: standing fields}, {game_id: contribution}) recomputed from finished games"""
+    standings, contributions = {}, {}
+    for game in Basketball.objects.filter(status="FINISHED"):
+        c = contributions[game.pk] = contribution(game)
+        for team_id, row in deltas(c).items():
+            total = standings.setdefault(team_id, dict.fromkeys(FIELDS, 0))
+            for field, amount in row.items():
+                total[field] += amount
+    return standings, contributions
+
+
+@transaction.atomic
+def rebuild() -> int:
+    """Replace the table and every contribution record with recomputed ones"""
+    standings, contributions = totals()
+    TeamStanding.objects.all().delete()
+    StandingContribution.objects.all().delete()
+    TeamStanding.objects.bulk_create(TeamStanding(team_id=team_id, **row) for team_id, row in standings.items())
+    StandingContribution.objects.bulk_create(
+        StandingContribution(game_id=game_id, **c) for game_id, c in contributions.items()
+    )
+    _changed()
+    return len(standings)
@@ -0,0 +1,75 @@
+"""Server-Sent Events version of the live feed.
+
+Same groups, patches and snapshots as games.consumers.LiveFeed, for clients
+that cannot keep a WebSocket open through their proxy. Each event is named
+after the message type (``patch`` / ``snapshot``) and its id is the last
+``seq`` seen for every game, in ``last_seq`` form (``12:40,14:33``), so the
+browser's automatic ``Last-Event-ID`` reconnect resumes from the replay buffer.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from . import broadcast
+from .broadcast import LIVE_GROUP, game_group, sport_group
+from .consumers import _snapshots
+
+HEARTBEAT = getattr(settings, "LIVE_SSE_HEARTBEAT_S", 15)
+# Milliseconds the browser waits before reconnecting
+RETRY_MS = 3000
+
+
+def _event(message: dict, seqs: dict) -> str:
+    seqs[message["game_id"]] = message["seq"]
+    last_seq = ",".join(f"{game_id}:{seq}" for game_id, seq in sorted(seqs.items()))
+    return f"id: {last_seq}\nevent: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+
+async def live_events(game_ids: set, sports: set, resume: dict):
+    """Async iterator of SSE frames for the given games and sports, forever"""
+    broadcast.dispatcher.start()
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    groups = {game_group(gid) for gid in game_ids} | {sport_group(s) for s in sports}
+    if not groups:
+        groups = {LIVE_GROUP}
+    for group in groups:
+        await layer.group_add(group, channel)
+
+    seqs = dict(resume)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+
+        resumed = set()
+        for game_id, last_seq in resume.items():
+            messages = await sync_to_async(broadcast.replay)(game_id, last_seq)
+            if messages is None:
+                continue
+            for message in messages:
+                yield _event(message, seqs)
+            resumed.add(game_id)
+        for message in await _snapshots(game_ids - resumed, sports, groups == {LIVE_GROUP}, resumed):
+            yield _event(message, seqs)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(layer.receive(channel), HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from timing out an idle stream
+                yield ": ping\n\n"
+                continue
+            if event.get("type") != "push_update":
+                continue
+            data = event["data"]
+            # A game followed directly also reaches us through its sport group
+            if event.get("group", "").startswith("sport.") and data["game_id"] in game_ids:
+                continue
+            if data["seq"] <= seqs.get(data["game_id"], 0):
+                continue
+            yield _event(data, seqs)
+    finally:
+        for group in groups:
+            await layer.group_discard(group, channel)
@@ -1,3 +1,398 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import aggregates, broadcast, caching, parallel, standings, versions, views
+from .consumers import LiveFeed
+from .responses import FastJsonResponse
+from .models import (
+    Basketball, BasketballFoul, BasketballShot, Game, Player, PlayerSeasonAggregate, Team, TeamStanding,
+)
+from .pagination import InvalidPage, paginate, parse_limit
+
+# Keep the suite off Redis: every test gets a fresh in-process cache and layer
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+TEST_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+async def _run_inline(call, *args, **kwargs):
+    # The parallel reads of async views, on the test's own connection
+    return await sync_to_async(call, thread_sensitive=True)(*args, **kwargs)
+
+
+def make_basketball(status="LIVE", players=2):
+    """A basketball game between two new teams, with players on each side"""
+    team1 = Team.objects.create(name="Reds")
+    team2 = Team.objects.create(name="Blues")
+    players1 = [Player.objects.create(name=f"Red {i}", team=team1) for i in range(players)]
+    players2 = [Player.objects.create(name=f"Blue {i}", team=team2) for i in range(players)]
+    game = Basketball.objects.create(sport="BASKETBALL", status=status, team1=team1, team2=team2)
+    return game, players1, players2
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class MatchDetailTests(TestCase):
+    def setUp(self):
+        self.game, self.reds, _ = make_basketball()
+        BasketballShot.objects.create(
+            game=self.game, team=self.game.team1, player=self.reds[0], shot_type="2PT",
+            result="MADE", points_scored=2, quarter=1, time_remaining_seconds=600,
+        )
+
+    def get(self, query):
+        request = AsyncRequestFactory().get(f"/api/matches/{self.game.pk}/", query)
+        with mock.patch.object(parallel, "run", _run_inline):
+            return async_to_sync(views.api_match_detail)(request, match_id=self.game.pk)
+
+    def test_include_alone_reads_only_the_game_and_that_section(self):
+        # The base game row and the shots; not the basketball row behind winner
+        with self.assertNumQueries(2):
+            response = self.get({"include": "shots"})
+        data = json.loads(response.content)
+        self.assertEqual(set(data), {"id", "sport", "events"})
+        self.assertEqual([event["type"] for event in data["events"]], ["shot"])
+
+    def test_fields_and_include_together(self):
+        data = json.loads(self.get({"fields": "team1_score,winner", "include": "shots"}).content)
+        self.assertEqual(set(data), {"id", "sport", "team1_score", "winner", "events"})
+
+    def test_unknown_include_is_rejected(self):
+        self.assertEqual(self.get({"include": "replays"}).status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseCacheTests(SimpleTestCase):
+    """HIT / REFRESH / STALE_HIT / WAIT_FOR of games.caching, on a view that counts its runs"""
+
+    def setUp(self):
+        cache.clear()
+        self.runs = 0
+
+        def view(request, game_id):
+            self.runs += 1
+            return FastJsonResponse({"run": self.runs})
+
+        self.view = view
+        self.cached = caching.for_game()(view)
+
+    def get(self):
+        return self.cached(RequestFactory().get("/detail/"), game_id=1)
+
+    def entry(self):
+        return caching._entry(RequestFactory().get("/detail/"), self.view, versions.game_scope(1))
+
+    def test_hit_serves_the_stored_body(self):
+        first, second = self.get(), self.get()
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(second.content, first.content)
+
+    def test_write_rebuilds_in_the_background_and_serves_stale(self):
+        old = self.get()
+        versions.bump(versions.game_scope(1))
+        stale = self.get()
+        self.assertEqual(stale.content, old.content)
+        self.assertIn("ETag", stale.headers)
+        deadline = time.monotonic() + 2
+        while cache.get(self.entry().key) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(json.loads(self.get().content), {"run": 2})
+
+    def test_stale_hit_while_someone_else_rebuilds(self):
+        old = self.get()
+        versions.bump(versions.game_scope(1))
+        cache.add(self.entry().lock_key, 1)
+        self.assertEqual(self.get().content, old.content)
+        self.assertEqual(self.runs, 1)
+
+    def test_waits_for_the_rebuild_of_another_request(self):
+        entry = self.entry()
+        cache.add(entry.lock_key, 1)
+        threading.Timer(0.1, cache.set, (entry.key, b'{"run": "other"}')).start()
+        self.assertEqual(json.loads(self.get().content), {"run": "other"})
+        self.assertEqual(self.runs, 0)
+
+    def test_builds_without_waiting_once_the_waiter_slots_are_taken(self):
+        cache.add(self.entry().lock_key, 1)
+        started = time.monotonic()
+        with mock.patch.object(caching, "_sync_waiters", threading.BoundedSemaphore(1)) as waiters:
+            waiters.acquire()
+            response = self.get()
+        self.assertLess(time.monotonic() - started, caching.POLL)
+        self.assertEqual(json.loads(response.content), {"run": 1})
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class MatchListTests(TestCase):
+    def setUp(self):
+        self.team1 = Team.objects.create(name="Reds")
+        self.team2 = Team.objects.create(name="Blues")
+        self.games = [Game.objects.create(team1=self.team1, team2=self.team2) for _ in range(7)]
+        # Rows created in the same instant are told apart by id
+        Game.objects.filter(pk__in=[g.pk for g in self.games[2:5]]).update(created_at=self.games[2].created_at)
+
+    def get(self, query):
+        request = AsyncRequestFactory().get("/api/matches/", query)
+        with mock.patch.object(parallel, "run", _run_inline):
+            return async_to_sync(views.api_get_matches)(request)
+
+    def test_pages_cover_every_game_once_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = paginate(Game.objects.all(), cursor, 3)
+            seen += [g.pk for g in rows]
+            if cursor is None:
+                break
+        expected = list(Game.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_from_the_api_continues_the_list(self):
+        first = json.loads(self.get({"limit": 4}).content)
+        second = json.loads(self.get({"limit": 4, "cursor": first["next_cursor"]}).content)
+        ids = [m["id"] for m in first["matches"] + second["matches"]]
+        self.assertEqual(sorted(ids), sorted(g.pk for g in self.games))
+        self.assertIsNone(second["next_cursor"])
+
+    def test_bad_cursor_and_limit_are_rejected(self):
+        for query in ({"cursor": "nonsense"}, {"limit": "ten"}, {"limit": "0"}, {"sport": "chess"}):
+            with self.subTest(query=query):
+                self.assertEqual(self.get(query).status_code, 400)
+        with self.assertRaises(InvalidPage):
+            paginate(Game.objects.all(), "bm9wZQ")
+        self.assertEqual(parse_limit("5000"), 200)
+
+    def test_date_to_includes_the_whole_day(self):
+        noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        Game.objects.update(scheduled_time=noon - timedelta(days=1))
+        Game.objects.filter(pk=self.games[0].pk).update(scheduled_time=noon)
+        day = timezone.localdate(noon).isoformat()
+        for query in ({"date_to": day, "date_from": day}, {"date_from": day}):
+            with self.subTest(query=query):
+                ids = [m["id"] for m in json.loads(self.get(query).content)["matches"]]
+                self.assertEqual(ids, [self.games[0].pk])
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class GameEventsSinceTests(TestCase):
+    def setUp(self):
+        self.game, self.reds, self.blues = make_basketball()
+        start = timezone.now()
+        for i in range(3):
+            BasketballShot.objects.create(
+                game=self.game, team=self.game.team1, player=self.reds[0], shot_type="2PT",
+                result="MADE", points_scored=2, quarter=1, time_remaining_seconds=600 - i,
+            )
+            BasketballFoul.objects.create(
+                game=self.game, team=self.game.team2, player=self.blues[0], foul_type="PERSONAL",
+                quarter=1, time_remaining_seconds=600 - i,
+            )
+        # Two shots and a foul share an instant, which the cursor must not split badly
+        for model, seconds in ((BasketballShot, (0, 2, 2)), (BasketballFoul, (2, 3, 5))):
+            for row, second in zip(model.objects.order_by("id"), seconds):
+                model.objects.filter(pk=row.pk).update(created_at=start + timedelta(seconds=second))
+
+    def get(self, query):
+        request = AsyncRequestFactory().get(f"/api/basketball/{self.game.pk}/events/", query)
+        with mock.patch.object(parallel, "run", _run_inline):
+            return async_to_sync(views.api_basketball_game_events)(request, game_id=self.game.pk)
+
+    def test_since_pages_through_every_event_oldest_first(self):
+        everything = json.loads(self.get({}).content)["events"]
+        seen, cursor = [], ""
+        while True:
+            page = json.loads(self.get({"since": cursor, "limit": 2}).content)
+            seen += page["events"]
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(len(seen), 6)
+        self.assertEqual({(e["type"], e["id"]) for e in seen}, {(e["type"], e["id"]) for e in everything})
+        self.assertEqual([e["timestamp"] for e in seen], sorted(e["timestamp"] for e in seen))
+        # Nothing new: the same cursor comes back
+        page = json.loads(self.get({"since": cursor}).content)
+        self.assertEqual((page["events"], page["next_cursor"]), ([], cursor))
+
+    def test_bad_cursor_is_rejected(self):
+        self.assertEqual(self.get({"since": "nonsense"}).status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class StandingsTests(TestCase):
+    def setUp(self):
+        self.game, _, _ = make_basketball()
+
+    def table(self):
+        return {
+            row.team_id: {field: getattr(row, field) for field in standings.FIELDS}
+            for row in TeamStanding.objects.all()
+            if any(getattr(row, field) for field in standings.FIELDS)
+        }
+
+    def finish(self, game, team1_score, team2_score):
+        game.status, game.team1_score, game.team2_score = "FINISHED", team1_score, team2_score
+        game.winner_id = game.team1_id if team1_score > team2_score else game.team2_id
+        game.save()
+        standings.sync(game)
+
+    def test_table_follows_finishing_correcting_and_reopening(self):
+        self.finish(self.game, 80, 70)
+        self.assertEqual(self.table(), standings.totals()[0])
+        self.assertEqual(self.table()[self.game.team1_id]["wins"], 1)
+
+        self.finish(self.game, 80, 90)
+        self.assertEqual(self.table(), standings.totals()[0])
+        self.assertEqual(self.table()[self.game.team2_id]["points"], 1)
+        self.assertEqual(self.table()[self.game.team1_id]["matches_played"], 1)
+
+        self.game.status = "LIVE"
+        self.game.save()
+        standings.sync(self.game)
+        self.assertEqual(self.table(), {})
+
+    def test_deleting_a_finished_game_takes_it_out(self):
+        self.finish(self.game, 60, 50)
+        other = Basketball.objects.create(sport="BASKETBALL", team1=self.game.team1, team2=self.game.team2)
+        self.finish(other, 40, 50)
+        self.game.delete()
+        self.assertEqual(self.table(), standings.totals()[0])
+        self.assertEqual(self.table()[other.team2_id]["wins"], 1)
+
+    def test_changes_bump_the_global_version_on_commit(self):
+        before = versions.current(versions.ALL)
+        self.game.status = "FINISHED"
+        with self.captureOnCommitCallbacks(execute=True):
+            standings.sync(self.game)
+        self.assertGreater(versions.current(versions.ALL), before)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class PlayerAggregateTests(TestCase):
+    def setUp(self):
+        self.game, self.reds, self.blues = make_basketball()
+
+    def maintained(self):
+        fields = ("player_id", "team_id", "total_matches", "total_3pt", "total_2pt", "total_1pt", "total_points")
+        return {
+            row.player_id: {field: getattr(row, field) for field in fields}
+            for row in PlayerSeasonAggregate.objects.all()
+            if row.total_matches or row.total_points
+        }
+
+    def shoot(self, player, shot_type, result="MADE", game=None):
+        game = game or self.game
+        return BasketballShot.objects.create(
+            game=game, team=player.team, player=player, shot_type=shot_type, result=result,
+            points_scored={"3PT": 3, "2PT": 2, "FT": 1}[shot_type] if result == "MADE" else 0,
+            quarter=1, time_remaining_seconds=600,
+        )
+
+    def test_signals_keep_the_totals_of_the_raw_tables(self):
+        # Creating the game gave every player a PlayerStat, so a match each
+        self.shoot(self.reds[0], "3PT")
+        self.shoot(self.reds[0], "FT")
+        self.shoot(self.reds[1], "2PT", result="MISSED")
+        undone = self.shoot(self.blues[0], "2PT")
+        self.assertEqual(self.maintained(), aggregates.totals())
+
+        undone.delete()
+        self.assertEqual(self.maintained(), aggregates.totals())
+        self.assertEqual(self.maintained()[self.reds[0].pk]["total_points"], 4)
+
+    def test_deleting_a_game_takes_off_its_matches_and_points(self):
+        other = Basketball.objects.create(sport="BASKETBALL", team1=self.game.team1, team2=self.game.team2)
+        for game in (self.game, other):
+            self.shoot(self.reds[0], "2PT", game=game)
+        self.game.delete()
+        self.assertEqual(self.maintained(), aggregates.totals())
+        self.assertEqual(self.maintained()[self.reds[0].pk]["total_matches"], 1)
+
+    def test_rebuild_matches_the_totals_and_bumps_the_version(self):
+        self.shoot(self.reds[0], "3PT")
+        PlayerSeasonAggregate.objects.update(total_points=99)
+        before = versions.current(versions.ALL)
+        with self.captureOnCommitCallbacks(execute=True):
+            aggregates.rebuild()
+        self.assertEqual(self.maintained(), aggregates.totals())
+        self.assertGreater(versions.current(versions.ALL), before)
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class LiveProtocolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.game, self.reds, _ = make_basketball()
+
+    def update(self, kind="shot", **state):
+        return {
+            "game_id": self.game.pk, "sport": "BASKETBALL", "kind": kind,
+            "state": {"status": "LIVE", "team1_score": 0, "team2_score": 0, **state},
+            "events": [{"kind": kind}],
+        }
+
+    def test_patches_carry_only_what_changed_in_sequence(self):
+        first, = broadcast.prepare([self.update(team1_score=2)])
+        second, = broadcast.prepare([self.update(team1_score=2, team2_score=3)])
+        self.assertEqual(second["seq"], first["seq"] + 1)
+        self.assertEqual(second["changes"], {"team2_score": 3})
+
+    def test_updates_of_one_game_in_a_batch_are_merged(self):
+        patch, = broadcast.prepare([self.update(team1_score=2), self.update("foul", team1_score=2, team2_score=1)])
+        self.assertEqual(patch["changes"]["team2_score"], 1)
+        self.assertEqual([event["kind"] for event in patch["events"]], ["shot", "foul"])
+
+    def test_replay_returns_missed_patches_or_none(self):
+        patches = [broadcast.prepare([self.update(team1_score=n)])[0] for n in range(1, 5)]
+        first_seq = patches[0]["seq"]
+        self.assertEqual(broadcast.replay(self.game.pk, first_seq), patches[1:])
+        self.assertEqual(broadcast.replay(self.game.pk, patches[-1]["seq"]), [])
+        self.assertIsNone(broadcast.replay(self.game.pk, patches[-1]["seq"] + 1))
+        self.assertIsNone(broadcast.replay(self.game.pk, first_seq - broadcast.REPLAY_SIZE - 1))
+
+    def publish(self, points):
+        self.game.team1_score += points
+        self.game.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            broadcast.publish(self.game, kind="shot", event={"points_scored": points})
+
+    async def test_connected_socket_receives_published_patches(self):
+        socket = WebsocketCommunicator(LiveFeed.as_asgi(), f"/ws/live/?games={self.game.pk}")
+        connected, _ = await socket.connect()
+        self.assertTrue(connected)
+        snapshot = await socket.receive_json_from()
+        self.assertEqual(snapshot["type"], "snapshot")
+
+        await sync_to_async(self.publish)(2)
+        patch = await socket.receive_json_from(timeout=3)
+        self.assertEqual((patch["type"], patch["seq"]), ("patch", snapshot["seq"] + 1))
+        self.assertEqual(patch["changes"], {"team1_score": 2})
+        await socket.disconnect()
+
+    async def test_resuming_socket_gets_only_what_it_missed(self):
+        await sync_to_async(self.publish)(2)
+        seen = await sync_to_async(broadcast.snapshot)(self.game)
+        await sync_to_async(self.publish)(3)
+        await sync_to_async(self.publish)(1)
+        # Until the dispatcher has numbered both
+        for _ in range(300):
+            if len(await sync_to_async(broadcast.replay)(self.game.pk, seen["seq"]) or ()) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        socket = WebsocketCommunicator(
+            LiveFeed.as_asgi(), f"/ws/live/?games={self.game.pk}&last_seq={self.game.pk}:{seen['seq']}",
+        )
+        await socket.connect()
+        missed = [await socket.receive_json_from(timeout=3) for _ in range(2)]
+        self.assertEqual([m["type"] for m in missed], ["patch", "patch"])
+        self.assertEqual([m["seq"] for m in missed], [seen["seq"] + 1, seen["seq"] + 2])
+        self.assertEqual(missed[-1]["changes"], {"team1_score": 6})
+        self.assertTrue(await socket.receive_nothing(0.2))
+        await socket.disconnect()
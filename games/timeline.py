@@ -0,0 +1,152 @@
+"""Play-by-play timeline of a basketball game.
+
+Shots, fouls and substitutions live in separate tables; the timeline merges
+them in ``(created_at, kind, id)`` order, kind being the position in
+``KINDS``, which breaks ties between rows of different tables written in the
+same instant. ``events_since`` continues after a cursor holding that key, reading
+each table through its ``(game, created_at)`` index and never more than a page
+of rows from any of them. ``aall_events`` and ``aevents_since`` are the
+async versions, which query the three tables concurrently.
+"""
+import heapq
+from functools import partial
+
+from django.db.models import Q
+
+from . import parallel
+from .models import BasketballFoul, BasketballShot, BasketballSubstitution
+from .pagination import InvalidPage, pack, unpack
+
+
+def _ref(obj):
+    return {'id': obj.id, 'name': obj.name}
+
+
+def shot_event(shot) -> dict:
+    return {
+        'type': 'shot',
+        'id': shot.id,
+        'timestamp': shot.created_at.isoformat(),
+        'quarter': shot.quarter,
+        'team': _ref(shot.team),
+        'player': _ref(shot.player),
+        'shot_type': shot.shot_type,
+        'result': shot.result,
+        'points_scored': shot.points_scored,
+        'assist_player': _ref(shot.assist_player) if shot.assist_player else None,
+    }
+
+
+def foul_event(foul) -> dict:
+    return {
+        'type': 'foul',
+        'id': foul.id,
+        'timestamp': foul.created_at.isoformat(),
+        'quarter': foul.quarter,
+        'team': _ref(foul.team),
+        'player': _ref(foul.player),
+        'foul_type': foul.foul_type,
+        'fouled_player': _ref(foul.fouled_player) if foul.fouled_player else None,
+    }
+
+
+def substitution_event(sub) -> dict:
+    return {
+        'type': 'substitution',
+        'id': sub.id,
+        'timestamp': sub.created_at.isoformat(),
+        'quarter': sub.quarter,
+        'team': _ref(sub.team),
+        'player_out': _ref(sub.player_out),
+        'player_in': _ref(sub.player_in),
+    }
+
+
+KINDS = ('shot', 'foul', 'substitution')
+
+SOURCES = {
+    'shot': (BasketballShot, ('player', 'team', 'assist_player'), shot_event),
+    'foul': (BasketballFoul, ('player', 'team', 'fouled_player'), foul_event),
+    'substitution': (BasketballSubstitution, ('team', 'player_out', 'player_in'), substitution_event),
+}
+
+
+def encode_cursor(created_at, kind: str, row_id: int) -> str:
+    return pack(created_at, kind, row_id)
+
+
+def decode_cursor(cursor: str):
+    created_at, kind, row_id = unpack(cursor, 3)
+    if kind not in KINDS or not isinstance(row_id, int):
+        raise InvalidPage("invalid cursor")
+    return created_at, kind, row_id
+
+
+def _newest_first(game_id, kind: str) -> list:
+    model, related, _ = SOURCES[kind]
+    return list(model.objects.filter(game_id=game_id).select_related(*related).order_by('-created_at'))
+
+
+def _merge_all(rows_by_kind) -> tuple:
+    events, newest = [], None
+    for rank, (kind, rows) in enumerate(zip(KINDS, rows_by_kind)):
+        serialize = SOURCES[kind][2]
+        for row in rows:
+            events.append(serialize(row))
+            if newest is None or (row.created_at, rank, row.id) > newest[0]:
+                newest = ((row.created_at, rank, row.id), kind)
+    events.sort(key=lambda x: x['timestamp'], reverse=True)
+    if newest is None:
+        return events, None
+    (created_at, _, row_id), kind = newest
+    return events, encode_cursor(created_at, kind, row_id)
+
+
+def all_events(game) -> tuple:
+    """(every event newest first, cursor of the newest one or None)"""
+    return _merge_all([_newest_first(game.pk, kind) for kind in KINDS])
+
+
+async def aall_events(game_id) -> tuple:
+    """all_events, reading the three tables side by side"""
+    return _merge_all(await parallel.gather(*(partial(_newest_first, game_id, kind) for kind in KINDS)))
+
+
+def _after(game_id, kind: str, after, limit: int) -> list:
+    model, related, _ = SOURCES[kind]
+    rank = KINDS.index(kind)
+    rows = model.objects.filter(game_id=game_id)
+    if after:
+        created_at, after_kind, row_id = after
+        later = Q(created_at__gt=created_at)
+        after_rank = KINDS.index(after_kind)
+        if rank > after_rank:
+            later |= Q(created_at=created_at)
+        elif rank == after_rank:
+            later |= Q(created_at=created_at, id__gt=row_id)
+        rows = rows.filter(later)
+    rows = rows.select_related(*related).order_by('created_at', 'id')[:limit + 1]
+    return [(row.created_at, rank, row.id, row) for row in rows]
+
+
+def _merge_since(streams, cursor, limit: int) -> tuple:
+    merged = list(heapq.merge(*streams, key=lambda item: item[:3]))
+    page = merged[:limit]
+    if page:
+        created_at, rank, row_id, _ = page[-1]
+        cursor = encode_cursor(created_at, KINDS[rank], row_id)
+    events = [SOURCES[KINDS[rank]][2](row) for _, rank, _, row in page]
+    return events, cursor, len(merged) > limit
+
+
+def events_since(game, cursor: str | None, limit: int) -> tuple:
+    """(up to limit events after cursor, oldest first; cursor to continue from; more waiting)"""
+    after = decode_cursor(cursor) if cursor else None
+    return _merge_since([_after(game.pk, kind, after, limit) for kind in KINDS], cursor, limit)
+
+
+async def aevents_since(game_id, cursor: str | None, limit: int) -> tuple:
+    """events_since, reading the three tables side by side"""
+    after = decode_cursor(cursor) if cursor else None
+    streams = await parallel.gather(*(partial(_after, game_id, kind, after, limit) for kind in KINDS))
+    return _merge_since(streams, cursor, limit)
@@ -5,7 +5,9 @@ from django.contrib.auth import views as auth_views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('live/card/<int:game_id>/', views.home_live_card, name='home_live_card'),
     path('api/matches/', views.api_get_matches, name='api_get_matches'),
+    path('api/matches/batch/', views.api_matches_batch, name='api_matches_batch'),
     path('api/matches/<int:match_id>/', views.api_match_detail, name='api_match_detail'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path("login/", auth_views.LoginView.as_view(template_name="games/login.html"), name="login"),
@@ -34,11 +36,13 @@ urlpatterns = [
     path('api/basketball/<int:game_id>/live/', views.api_basketball_live_update, name='api_basketball_live_update'),
     path('api/basketball/player-stats/', views.api_basketball_overall_player_stats, name='api_basketball_overall_player_stats'),
     path('api/basketball/team-standings/', views.api_basketball_team_standings, name='api_basketball_team_standings'),
+    path('api/live/stream/', views.api_live_stream, name='api_live_stream'),
 
     path('dashboard/game-status/<int:game_id>/', views.set_game_status, name='set_game_status'),
     path('dashboard/analytics/', views.api_analytics, name='api_analytics'),
 
     path('healthz/', lambda request: JsonResponse({"message": "OK"}, status=200), name='healthz'),
+    path('healthz/live/', views.live_health, name='live_health'),
         path('local-ip/', views.api_local_ip, name='api_local_ip'),
 
 ]
@@ -0,0 +1,116 @@
+"""Resource versions for conditional GET.
+
+Every write to a game or anything hanging off it bumps the version of that
+game (``game_scope(id)``) and the global one (``ALL``), from the signal
+handlers in games.signals once the transaction commits. A version is the
+time of its last bump in nanoseconds, kept in the default cache, which gives
+the public JSON views both an ETag and a Last-Modified; ``for_game`` and
+``for_all`` answer a matching revalidation with 304 from that single cache
+read, before the view runs any query. For async views that read goes through
+``cache.aget``, so it never blocks the event loop.
+
+A version missing from the cache is recreated as "now", so losing the cache
+only costs clients one full response.
+"""
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+ALL = "all"
+# Bumped with ALL by writes to rows shown across games (teams, players)
+SHARED = "shared"
+
+
+def game_scope(game_id) -> str:
+    return f"game:{game_id}"
+
+
+def _key(scope: str) -> str:
+    return f"version:{scope}"
+
+
+def bump(*scopes: str) -> None:
+    now = time.time_ns()
+    cache.set_many({_key(scope): now for scope in scopes}, None)
+
+
+def current(scope: str) -> int:
+    version = cache.get(_key(scope))
+    if version is None:
+        cache.add(_key(scope), time.time_ns(), None)
+        version = cache.get(_key(scope))
+    return version
+
+
+def current_many(scopes) -> dict:
+    """{scope: current(scope)}, from one cache read when they all exist"""
+    found = cache.get_many([_key(scope) for scope in scopes])
+    return {scope: found[_key(scope)] if _key(scope) in found else current(scope) for scope in scopes}
+
+
+async def acurrent(scope: str) -> int:
+    version = await cache.aget(_key(scope))
+    if version is None:
+        await cache.aadd(_key(scope), time.time_ns(), None)
+        version = await cache.aget(_key(scope))
+    return version
+
+
+def of_request(request, scope: str) -> int:
+    """Version of scope as first seen by request"""
+    # ETag, Last-Modified and the response cache key all need it; read the cache once
+    versions = request.__dict__.setdefault("_resource_versions", {})
+    if scope not in versions:
+        versions[scope] = current(scope)
+    return versions[scope]
+
+
+async def aof_request(request, scope: str) -> int:
+    """of_request for async views, without blocking the event loop"""
+    versions = request.__dict__.setdefault("_resource_versions", {})
+    if scope not in versions:
+        versions[scope] = await acurrent(scope)
+    return versions[scope]
+
+
+def etag(scope: str, version: int) -> str:
+    return f"{scope}:{version}"
+
+
+def modified(version: int) -> datetime:
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def _conditional(scope_for):
+    conditional = condition(
+        etag_func=lambda request, **kwargs: etag(scope_for(kwargs), of_request(request, scope_for(kwargs))),
+        last_modified_func=lambda request, **kwargs: modified(of_request(request, scope_for(kwargs))),
+    )
+
+    def decorator(view):
+        checked = conditional(view)
+        if not iscoroutinefunction(view):
+            return checked
+
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # condition() calls its functions on the event loop; have the
+            # version in hand so they do not touch the cache there
+            await aof_request(request, scope_for(kwargs))
+            return await checked(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def for_game(kwarg: str = "game_id"):
+    """Conditional GET for a view of the game named by its URL kwarg"""
+    return _conditional(lambda kwargs: game_scope(kwargs[kwarg]))
+
+
+def for_all():
+    """Conditional GET for a view spanning every game"""
+    return _conditional(lambda kwargs: ALL)
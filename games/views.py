@@ -1,57 +1,33 @@
 from django.views.decorators.http import require_GET
 from django.http import JsonResponse
 import socket
+from functools import partial
+from . import caching, parallel, versions
+from .responses import FastJsonResponse
 # API endpoint to get all matches
 @require_GET
-def api_get_matches(request):
-    games = Game.objects.select_related('team1', 'team2').all().order_by('-created_at')
-    data = []
-    for g in games:
-        match_data = {
-            'id': g.id,
-            'sport': g.sport,
-            'status': g.status,
-            'scheduled_time': g.scheduled_time.isoformat() if g.scheduled_time else None,
-            'team1': {
-                'id': g.team1.id,
-                'name': g.team1.name,
-                'logo': g.team1.logo,
-            } if g.team1 else None,
-            'team2': {
-                'id': g.team2.id,
-                'name': g.team2.name,
-                'logo': g.team2.logo,
-            } if g.team2 else None,
-            'team1_score': g.team1_score,
-            'team2_score': g.team2_score,
-            'winner': {
-                'id': g.winner.id,
-                'name': g.winner.name
-            } if hasattr(g, 'winner') and g.winner else None,
-            'created_at': g.created_at.isoformat() if g.created_at else None,
-            'updated_at': g.updated_at.isoformat() if g.updated_at else None,
-        }
-        
-        # Add basketball-specific data if it's a basketball game
-        if g.sport == 'BASKETBALL':
-            try:
-                basketball_game = Basketball.objects.get(id=g.id)
-                
-                match_data['basketball_details'] = {
-                    'current_quarter': basketball_game.current_quarter,
-                    'team1_fouls': basketball_game.team1_fouls_current_quarter,
-                    'team2_fouls': basketball_game.team2_fouls_current_quarter,
-                    'active_players': {
-                        'team1': [{'id': p.id, 'name': p.name} for p in basketball_game.get_team1_active_players()],
-                        'team2': [{'id': p.id, 'name': p.name} for p in basketball_game.get_team2_active_players()],
-                    }
-                }
-            except Basketball.DoesNotExist:
-                pass
-        
-        data.append(match_data)
-    return JsonResponse({'matches': data})
-from django.shortcuts import render, get_object_or_404, redirect
+@versions.for_all()
+@caching.for_all()
+async def api_get_matches(request):
+    """Matches newest first, a page at a time.
+
+    Filters: sport and status (comma separated), team (id of either side),
+    date_from / date_to (on scheduled_time; dates are inclusive) and live=1.
+    Pass the returned next_cursor as cursor to get the following page.
+    """
+    try:
+        games = _filter_matches(Game.objects.select_related('team1', 'team2'), request.GET)
+        games, next_cursor = await parallel.run(
+            paginate, games, request.GET.get('cursor'), parse_limit(request.GET.get('limit'))
+        )
+    except ValueError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+    return FastJsonResponse({
+        'matches': [GameSnapshot(g).match_summary() for g in await aload_matches(games)],
+        'next_cursor': next_cursor,
+    })
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from django.db import transaction
 from django.db.models import Sum, Count, Q
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
@@ -60,8 +36,17 @@ from django.http import JsonResponse
 from .models import *
 from django.utils import timezone
 from datetime import datetime
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from . import broadcast, fragments, standings
+from .boxscore import BoxScoreEngine
+from .consumers import MAX_SUBSCRIPTIONS, _parse_game_ids, _parse_last_seq, _parse_sports, feed_stats
+from .loaders import aload_matches, load_matches
+from .pagination import paginate, parse_limit
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import time, timedelta
+from .streams import live_events
+from .timeline import aall_events, aevents_since
+from django.http import HttpResponse, StreamingHttpResponse
+from .snapshots import BATCH_FIELDS, GameSnapshot
 
 @login_required
 def logout_view(request):
@@ -69,161 +54,28 @@ def logout_view(request):
     return redirect("login")
 
 def home(request):
-    upcoming = Game.objects.filter(status="SCHEDULED").select_related("team1", "team2").order_by("scheduled_time")
-    live_games = Game.objects.filter(status="LIVE").select_related("team1", "team2")
-
-    live_context = []
-    for g in live_games:
-        item = {"game": g}
-        if g.sport == "FOOTBALL":
-            t1_top = (
-                PlayerStat.objects.filter(game=g, team=g.team1).order_by("-points", "player__name").first()
-            )
-            t2_top = (
-                PlayerStat.objects.filter(game=g, team=g.team2).order_by("-points", "player__name").first()
-            )
-            t1_last = (
-                ScoreEvent.objects.filter(game=g, team=g.team1, sport="FOOTBALL", points__gt=0)
-                .order_by("-created_at")
-                .first()
-            )
-            t2_last = (
-                ScoreEvent.objects.filter(game=g, team=g.team2, sport="FOOTBALL", points__gt=0)
-                .order_by("-created_at")
-                .first()
-            )
-            t1_last_pts = None
-            t2_last_pts = None
-            if t1_last and t1_last.player_id:
-                ps = PlayerStat.objects.filter(game=g, player=t1_last.player).first()
-                t1_last_pts = ps.points if ps else 0
-            if t2_last and t2_last.player_id:
-                ps = PlayerStat.objects.filter(game=g, player=t2_last.player).first()
-                t2_last_pts = ps.points if ps else 0
-            item.update(
-                {
-                    "type": "football",
-                    "team1_score": g.team1_score,
-                    "team2_score": g.team2_score,
-                    "team1_top": t1_top,
-                    "team2_top": t2_top,
-                    "team1_last": t1_last,
-                    "team2_last": t2_last,
-                    "team1_last_pts": t1_last_pts,
-                    "team2_last_pts": t2_last_pts,
-                }
-            )
-        elif g.sport == "BASKETBALL":
-            # Get enhanced basketball statistics - handle missing fields gracefully
-            bg = None
-            try:
-                bg = Basketball.objects.get(pk=g.pk) if hasattr(g, 'basketball') else None
-            except:
-                # Database might not have new fields yet
-                pass
-            
-            # Get top scorers for each team
-            t1_players = PlayerStat.objects.filter(game=g, team=g.team1).select_related("player").order_by("-points", "player__name")
-            t2_players = PlayerStat.objects.filter(game=g, team=g.team2).select_related("player").order_by("-points", "player__name")
-            
-            # Get recent events - handle missing tables gracefully
-            recent_shots = []
-            recent_fouls = []
-            try:
-                recent_shots = BasketballShot.objects.filter(game=g).select_related('player', 'team').order_by('-created_at')[:3]
-                recent_fouls = BasketballFoul.objects.filter(game=g).select_related('player', 'team').order_by('-created_at')[:2]
-            except:
-                # New tables might not exist yet
-                pass
-            
-            # Get team shooting stats - handle missing tables gracefully
-            team1_fg_pct = 0
-            team2_fg_pct = 0
-            try:
-                team1_shots = BasketballShot.objects.filter(game=g, team=g.team1)
-                team2_shots = BasketballShot.objects.filter(game=g, team=g.team2)
-                
-                if team1_shots.exists():
-                    team1_made = team1_shots.filter(result='MADE').count()
-                    team1_attempted = team1_shots.count()
-                    team1_fg_pct = (team1_made / team1_attempted * 100) if team1_attempted > 0 else 0
-                
-                if team2_shots.exists():
-                    team2_made = team2_shots.filter(result='MADE').count()
-                    team2_attempted = team2_shots.count()
-                    team2_fg_pct = (team2_made / team2_attempted * 100) if team2_attempted > 0 else 0
-            except:
-                # New tables might not exist yet
-                pass
-            
-            basketball_data = {
-                "type": "basketball",
-                "team1_score": g.team1_score,
-                "team2_score": g.team2_score,
-                "team1_players": t1_players,
-                "team2_players": t2_players,
-                "recent_shots": recent_shots,
-                "recent_fouls": recent_fouls,
-                "team1_fg_pct": round(team1_fg_pct, 1),
-                "team2_fg_pct": round(team2_fg_pct, 1),
-            }
-            
-            # Add game state if it's a Basketball instance with new fields
-            if bg:
-                try:
-                    basketball_data.update({
-                        "current_quarter": bg.current_quarter,
-                        "time_remaining": bg.time_remaining_seconds,
-                        "team1_fouls": bg.team1_fouls_current_quarter,
-                        "team2_fouls": bg.team2_fouls_current_quarter,
-                        "possession_team": bg.possession_team,
-                        "overtime_periods": bg.overtime_periods,
-                    })
-                except AttributeError:
-                    # New fields might not exist yet, provide defaults
-                    basketball_data.update({
-                        "current_quarter": 1,
-                        "time_remaining": 720,
-                        "team1_fouls": 0,
-                        "team2_fouls": 0,
-                        "possession_team": None,
-                        "overtime_periods": 0,
-                    })
-            
-            item.update(basketball_data)
-        elif g.sport == "CRICKET":
-            cg = Cricket.objects.get(pk=g.pk)
-            batting_team = cg.team1 if cg.batting_side == "TEAM1" else cg.team2
-            team_runs = g.team1_score if cg.batting_side == "TEAM1" else g.team2_score
-            batsman_runs = None
-            bowler_wkts = None
-            if cg.current_batsman:
-                ps = PlayerStat.objects.filter(game=g, player=cg.current_batsman).first()
-                batsman_runs = ps.runs if ps else 0
-            if cg.current_bowler:
-                psb = PlayerStat.objects.filter(game=g, player=cg.current_bowler).first()
-                bowler_wkts = psb.wickets if psb else 0
-            item.update(
-                {
-                    "type": "cricket",
-                    "batting_team": batting_team,
-                    "team_runs": team_runs,
-                    "batsman": cg.current_batsman,
-                    "batsman_runs": batsman_runs,
-                    "bowler": cg.current_bowler,
-                    "bowler_wickets": bowler_wkts,
-                }
-            )
-        live_context.append(item)
+    upcoming = list(Game.objects.filter(status="SCHEDULED").select_related("team1", "team2").order_by("scheduled_time"))
+    live_games = list(Game.objects.filter(status="LIVE").select_related("team1", "team2"))
+    # Only the cards of games that changed since they were cached are rebuilt
+    cards, upcoming_html, hits, looked_up = fragments.home_fragments(live_games, upcoming)
 
-    return render(
+    response = render(
         request,
         "games/home.html",
         {
-            "upcoming": upcoming,
-            "live_games": live_context,
+            "live_cards": cards,
+            "upcoming_html": upcoming_html,
         },
     )
+    response["X-Fragment-Cache"] = f"{hits}/{looked_up}"
+    return response
+
+
+@require_GET
+def home_live_card(request, game_id: int):
+    """One live card of the home page, fetched by the live client to replace a stale one"""
+    game = get_object_or_404(Game.objects.select_related("team1", "team2"), pk=game_id, status="LIVE")
+    return HttpResponse(fragments.live_card(game))
 
 
 @login_required(login_url='/login/')
@@ -234,6 +86,84 @@ def dashboard(request):
     return render(request, "games/dashboard.html", {"live_games": live_games, "scheduled": scheduled, "finished": finished})
 
 
+MAX_BATCH = 100
+
+
+@require_GET
+@versions.for_all()
+def api_matches_batch(request):
+    """Compact state of many matches in one call: /api/matches/batch/?ids=1,2,3&fields=score,status,quarter
+
+    fields picks groups of BATCH_FIELDS (all of them when omitted); id and sport
+    are always included. Unknown ids are listed under missing.
+    """
+    raw_ids = [part.strip() for part in request.GET.get('ids', '').split(',') if part.strip()]
+    if not raw_ids or not all(part.isdigit() for part in raw_ids):
+        return FastJsonResponse({'error': 'ids must be a comma separated list of match ids'}, status=400)
+    ids = list(dict.fromkeys(int(part) for part in raw_ids))
+    if len(ids) > MAX_BATCH:
+        return FastJsonResponse({'error': f'at most {MAX_BATCH} ids per request'}, status=400)
+
+    fields = [f.strip() for f in request.GET.get('fields', '').split(',') if f.strip()] or list(BATCH_FIELDS)
+    unknown = [f for f in fields if f not in BATCH_FIELDS]
+    if unknown:
+        return FastJsonResponse({'error': f"unknown fields: {', '.join(unknown)}"}, status=400)
+
+    games = Game.objects.filter(pk__in=ids)
+    if 'teams' in fields:
+        games = games.select_related('team1', 'team2')
+    found = {g.pk: g for g in load_matches(games, active_players=False)}
+    return FastJsonResponse({
+        'matches': [GameSnapshot(found[i]).compact(fields) for i in ids if i in found],
+        'missing': [i for i in ids if i not in found],
+    })
+
+
+def _parse_choices(value, choices, name):
+    values = {v.strip().upper() for v in value.split(',') if v.strip()}
+    unknown = values - {code for code, _ in choices}
+    if unknown:
+        raise ValueError(f"unknown {name}: {', '.join(sorted(unknown))}")
+    return values
+
+
+def _scheduled_bound(value, name, end=False):
+    """scheduled_time filter for an ISO datetime, or for a whole ISO date"""
+    # Checked first: parse_datetime also reads a bare date, as its midnight
+    day = parse_date(value)
+    lookup = 'lte' if end else 'gte'
+    if day is not None:
+        if end:
+            day, lookup = day + timedelta(days=1), 'lt'
+        moment = datetime.combine(day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f"{name} must be an ISO date or datetime")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return {f'scheduled_time__{lookup}': moment}
+
+
+def _filter_matches(games, params):
+    """Apply the /api/matches/ query parameters to games; ValueError on bad input"""
+    if params.get('sport'):
+        games = games.filter(sport__in=_parse_choices(params['sport'], Game.SPORT_CHOICES, 'sport'))
+    if params.get('live') in ('1', 'true'):
+        games = games.filter(status='LIVE')
+    elif params.get('status'):
+        games = games.filter(status__in=_parse_choices(params['status'], Game.STATUS_CHOICES, 'status'))
+    if params.get('team'):
+        if not params['team'].isdigit():
+            raise ValueError("team must be a team id")
+        games = games.filter(Q(team1_id=params['team']) | Q(team2_id=params['team']))
+    if params.get('date_from'):
+        games = games.filter(**_scheduled_bound(params['date_from'], 'date_from'))
+    if params.get('date_to'):
+        games = games.filter(**_scheduled_bound(params['date_to'], 'date_to', end=True))
+    return games
+
+
 def _get_or_create_stat(game: Game, player: Player):
     return PlayerStat.objects.get_or_create(game=game, player=player, defaults={"team": player.team})[0]
 
@@ -320,52 +250,19 @@ def _determine_basketball_winner(game: Basketball) -> None:
         game.winner = None
 
 
-def _broadcast_game_update(game: Game, kind: str = "score_update", extra: dict | None = None) -> None:
-    layer = get_channel_layer()
-    if not layer:
+def _correct_finished_result(game: Basketball | None) -> None:
+    """Re-decide the winner and standings of a finished game whose score changed"""
+    if game is None or game.status != "FINISHED":
         return
-    
-    data = {
-        "kind": kind,
-        "game_id": game.id,
-        "sport": game.sport,
-        "team1_score": game.team1_score,
-        "team2_score": game.team2_score,
-        "status": game.status,
-    }
-    
-    # Add basketball-specific data if it's a basketball game
-    if game.sport == "BASKETBALL":
-        try:
-            basketball_game = Basketball.objects.get(pk=game.id)
-            data.update({
-                "team1_fouls": basketball_game.team1_fouls_current_quarter,
-                "team2_fouls": basketball_game.team2_fouls_current_quarter,
-                "actual_start_time": basketball_game.actual_start_time.isoformat() if basketball_game.actual_start_time else None,
-            })
-            
-        except Basketball.DoesNotExist:
-            pass
-    
-    # Add winner information if game is finished
-    if game.status == "FINISHED" and hasattr(game, 'winner') and game.winner:
-        data.update({
-            "winner": {
-                "id": game.winner.id,
-                "name": game.winner.name
-            }
-        })
-    
-    if extra:
-        data.update(extra)
-        
-    async_to_sync(layer.group_send)(
-        "live",
-        {
-            "type": "push_update",
-            "data": data,
-        },
-    )
+    _determine_basketball_winner(game)
+    with transaction.atomic():
+        game.save(update_fields=["winner"])
+        standings.sync(game)
+
+
+def _broadcast_game_update(game: Game, kind: str = "score_update", extra: dict | None = None) -> None:
+    """Push a patch for game to live viewers; extra describes the event behind it"""
+    broadcast.publish(game, kind=kind, event=extra)
 
 @login_required(login_url='/login/')
 def update_football(request, game_id: int):
@@ -385,7 +282,12 @@ def update_football(request, game_id: int):
             game.team2_score += 1
         game.save()
         ScoreEvent.objects.create(game=game, team=player.team, player=player, sport="FOOTBALL", points=1)
-        _broadcast_game_update(game)
+        _broadcast_game_update(game, extra={
+            "player_name": player.name,
+            "player_id": player.id,
+            "team_id": player.team_id,
+            "player_points": stat.points,
+        })
         return redirect("update_football", game_id=game.id)
 
     return render(request, "games/update_football.html", {"game": game, "players": players})
@@ -493,6 +395,7 @@ def update_basketball(request, game_id: int):
                 "shot_type": shot_type,
                 "result": result,
                 "points_scored": points_scored,
+                "player_points": stat.points if points_scored > 0 else None,
             }
             _broadcast_game_update(game, kind="shot", extra=shot_data)
         
@@ -616,6 +519,7 @@ def update_basketball(request, game_id: int):
                 "player_in_name": player_in.name,
                 "player_in_id": player_in.id,
             }
+            _broadcast_game_update(game, kind="substitution", extra=sub_data)
         
         elif action == "set_active_players":
             # Get selected players for each team
@@ -638,6 +542,7 @@ def update_basketball(request, game_id: int):
                     "team1_active_players": [{"id": p.id, "name": p.name} for p in game.get_team1_active_players()],
                     "team2_active_players": [{"id": p.id, "name": p.name} for p in game.get_team2_active_players()],
                 }
+                _broadcast_game_update(game, kind="active_players", extra=active_data)
             else:
                 messages.error(request, message)
         
@@ -669,6 +574,8 @@ def update_basketball(request, game_id: int):
                     }
                     
                     last_shot.delete()
+                    _correct_finished_result(game)
+                    _broadcast_game_update(game, kind="undo", extra=undo_data)
             except Exception:
                 pass
         
@@ -698,6 +605,7 @@ def update_basketball(request, game_id: int):
                     
                     # Delete the foul record (this will decrease the individual player's foul count)
                     last_foul.delete()
+                    _broadcast_game_update(game, kind="undo", extra=undo_data)
             except Exception:
                 pass
         
@@ -734,6 +642,7 @@ def update_basketball(request, game_id: int):
                     }
                     
                     last_sub.delete()
+                    _broadcast_game_update(game, kind="undo", extra=undo_data)
             except Exception:
                 pass
         
@@ -748,7 +657,6 @@ def update_basketball(request, game_id: int):
                     game.save()
                     
                     # Set quarter finished time for previous quarter
-                    from django.utils import timezone
                     current_time = timezone.now()
                     if game.current_quarter == 2:
                         game.quarter1_finished_time = current_time
@@ -764,6 +672,7 @@ def update_basketball(request, game_id: int):
                         "team1_fouls": game.team1_fouls_current_quarter,
                         "team2_fouls": game.team2_fouls_current_quarter,
                     }
+                    _broadcast_game_update(game, kind="state_update", extra=quarter_data)
                 elif game.current_quarter == 4:
                     # Game finished
                     game.status = "FINISHED"
@@ -772,14 +681,16 @@ def update_basketball(request, game_id: int):
                     # Determine and set the winner
                     _determine_basketball_winner(game)
                     
-                    game.save()
+                    with transaction.atomic():
+                        game.save()
+                        standings.sync(game)
+                    _broadcast_game_update(game, kind="status_change")
             except Exception:
                 pass
         
         elif action == "end_game":
             # End the game immediately
             try:
-                from django.utils import timezone
                 game.status = "FINISHED"
                 game.end_time = timezone.now()
                 
@@ -797,7 +708,10 @@ def update_basketball(request, game_id: int):
                 # Determine and set the winner
                 _determine_basketball_winner(game)
                 
-                game.save()
+                with transaction.atomic():
+                    game.save()
+                    standings.sync(game)
+                _broadcast_game_update(game, kind="status_change")
                 
                 # Redirect to dashboard when game is ended
                 return redirect("dashboard")
@@ -853,6 +767,7 @@ def update_cricket(request, game_id: int):
             if "bowler_id" in request.POST:
                 game.current_bowler = Player.objects.filter(pk=bowler_id).first() if bowler_id else None
             game.save()
+            _broadcast_game_update(game, kind="state_update")
         elif action == "runs":
             runs = int(request.POST.get("runs", 1))
             if game.current_batsman:
@@ -873,6 +788,12 @@ def update_cricket(request, game_id: int):
                     runs=runs,
                     batting_side=game.batting_side,
                 )
+                _broadcast_game_update(game, extra={
+                    "player_name": game.current_batsman.name,
+                    "player_id": game.current_batsman.id,
+                    "runs": runs,
+                    "player_runs": stat.runs,
+                })
         elif action == "wicket":
             if game.current_bowler:
                 st = _get_or_create_stat(game, game.current_bowler)
@@ -891,6 +812,11 @@ def update_cricket(request, game_id: int):
                     wicket=True,
                     batting_side=game.batting_side,
                 )
+                _broadcast_game_update(game, kind="wicket", extra={
+                    "player_name": game.current_bowler.name,
+                    "player_id": game.current_bowler.id,
+                    "player_wickets": st.wickets,
+                })
         return redirect("update_cricket", game_id=game.id)
     return render(
         request,
@@ -992,6 +918,8 @@ def update_undo(request, game_id: int):
             else:
                 game.team2_score = max(0, game.team2_score - last.points)
             game.save()
+            if last.sport == "BASKETBALL":
+                _correct_finished_result(Basketball.objects.filter(pk=game.id).first())
         elif last.sport == "CRICKET":
             game = get_object_or_404(Cricket, pk=game.id)
             if last.runs and last.player_id:
@@ -1016,6 +944,7 @@ def update_undo(request, game_id: int):
                     game.team2_deaths = max(0, game.team2_deaths - 1)
                 game.save()
         last.delete()
+        _broadcast_game_update(game, kind="undo")
     if game.sport == "FOOTBALL":
         return redirect("update_football", game_id=game.id)
     if game.sport == "BASKETBALL":
@@ -1089,7 +1018,16 @@ def set_game_status(request, game_id: int):
                     basketball_game.save()
             except Basketball.DoesNotExist:
                 pass
-        game.save()
+        with transaction.atomic():
+            game.save()
+            if is_basketball:
+                basketball_game = Basketball.objects.filter(pk=game.id).first()
+                if basketball_game:
+                    if status == "FINISHED":
+                        _determine_basketball_winner(basketball_game)
+                        basketball_game.save(update_fields=["winner"])
+                    standings.sync(basketball_game)
+        _broadcast_game_update(game, kind="status_change")
     return redirect("dashboard")
 
 
@@ -1190,33 +1128,10 @@ def basketball_game_stats(request, game_id: int):
     # Get all shots
     shots = BasketballShot.objects.filter(game=game).select_related('player', 'team', 'assist_player').order_by('-created_at')
     
-    # Get shooting statistics by team
-    team1_shots = shots.filter(team=game.team1)
-    team2_shots = shots.filter(team=game.team2)
-    
-    # Calculate shooting percentages
-    def get_shooting_stats(team_shots):
-        total_shots = team_shots.count()
-        made_shots = team_shots.filter(result='MADE').count()
-        three_pointers_made = team_shots.filter(shot_type='3PT', result='MADE').count()
-        three_pointers_attempted = team_shots.filter(shot_type='3PT').count()
-        free_throws_made = team_shots.filter(shot_type='FT', result='MADE').count()
-        free_throws_attempted = team_shots.filter(shot_type='FT').count()
-        
-        return {
-            'total_shots': total_shots,
-            'made_shots': made_shots,
-            'fg_percentage': (made_shots / total_shots * 100) if total_shots > 0 else 0,
-            'three_pointers_made': three_pointers_made,
-            'three_pointers_attempted': three_pointers_attempted,
-            'three_pt_percentage': (three_pointers_made / three_pointers_attempted * 100) if three_pointers_attempted > 0 else 0,
-            'free_throws_made': free_throws_made,
-            'free_throws_attempted': free_throws_attempted,
-            'ft_percentage': (free_throws_made / free_throws_attempted * 100) if free_throws_attempted > 0 else 0,
-        }
-    
-    team1_shooting = get_shooting_stats(team1_shots)
-    team2_shooting = get_shooting_stats(team2_shots)
+    # Shooting statistics by team
+    box = BoxScoreEngine(game)
+    team1_shooting = box.team(game.team1_id)
+    team2_shooting = box.team(game.team2_id)
     
     # Get fouls and violations
     fouls = BasketballFoul.objects.filter(game=game).select_related('player', 'team', 'fouled_player').order_by('-created_at')
@@ -1224,22 +1139,9 @@ def basketball_game_stats(request, game_id: int):
     substitutions = BasketballSubstitution.objects.filter(game=game).select_related('team', 'player_out', 'player_in').order_by('-created_at')
     timeouts = BasketballTimeout.objects.filter(game=game).select_related('team').order_by('-created_at')
     
-    # Player statistics
-    team1_player_stats = PlayerStat.objects.filter(game=game, team=game.team1).select_related('player').order_by('-points')
-    team2_player_stats = PlayerStat.objects.filter(game=game, team=game.team2).select_related('player').order_by('-points')
-    
-    # Add additional stats for each player
-    for stat in list(team1_player_stats) + list(team2_player_stats):
-        player_shots = shots.filter(player=stat.player)
-        player_fouls = fouls.filter(player=stat.player).count()
-        assists = shots.filter(assist_player=stat.player).count()
-        
-        stat.shots_made = player_shots.filter(result='MADE').count()
-        stat.shots_attempted = player_shots.count()
-        stat.three_pointers_made = player_shots.filter(shot_type='3PT', result='MADE').count()
-        stat.free_throws_made = player_shots.filter(shot_type='FT', result='MADE').count()
-        stat.fouls = player_fouls
-        stat.assists = assists
+    # Player statistics, with their shooting, fouls and assists
+    team1_player_stats = box.players(game.team1_id, by_points=True)
+    team2_player_stats = box.players(game.team2_id, by_points=True)
     
     context = {
         'game': game,
@@ -1271,6 +1173,7 @@ def start_basketball_game(request, game_id: int):
         game.team1_fouls_current_quarter = 0
         game.team2_fouls_current_quarter = 0
         game.save()
+        _broadcast_game_update(game, kind="status_change")
     
     return redirect("update_basketball", game_id=game.id)
 
@@ -1288,7 +1191,10 @@ def end_basketball_game(request, game_id: int):
         # Determine and set the winner
         _determine_basketball_winner(game)
         
-        game.save()
+        with transaction.atomic():
+            game.save()
+            standings.sync(game)
+        _broadcast_game_update(game, kind="status_change")
     
     return redirect("dashboard")
 
@@ -1336,215 +1242,240 @@ def basketball_api_stats(request, game_id: int):
         'latest_events': latest_events[:10]
     }
     
-    return JsonResponse(data)
+    return FastJsonResponse(data)
+
+
+# Top-level fields of match detail (id and sport are always present) and the
+# sections that cost queries; events stands for every event kind of the sport
+MATCH_FIELDS = (
+    'status', 'scheduled_time', 'team1', 'team2', 'team1_score', 'team2_score',
+    'winner', 'created_at', 'updated_at',
+)
+MATCH_INCLUDES = ('details', 'events', 'shots', 'fouls', 'substitutions', 'goals', 'player_stats')
+EVENT_KINDS = ('shots', 'fouls', 'substitutions', 'goals')
+
+
+def _parse_names(value, names, name):
+    values = {v.strip().lower() for v in value.split(',') if v.strip()}
+    unknown = values - set(names)
+    if unknown:
+        raise ValueError(f"unknown {name}: {', '.join(sorted(unknown))}")
+    return values
+
+
+def _detail_params(request):
+    """(fields, includes) asked for on match detail; everything when neither is given"""
+    fields = request.GET.get('fields')
+    include = request.GET.get('include')
+    if fields is None and include is None:
+        return set(MATCH_FIELDS), set(EVENT_KINDS) | {'details', 'player_stats'}
+    # include= alone asks for those sections, with only id and sport around them
+    fields = _parse_names(fields, MATCH_FIELDS, 'fields') if fields is not None else set()
+    includes = _parse_names(include or '', MATCH_INCLUDES, 'include')
+    if 'events' in includes:
+        includes |= set(EVENT_KINDS)
+    return fields, includes
+
+
+def _quarters(game):
+    return [
+        {
+            'quarter': q,
+            'team1_score': getattr(game, f'quarter{q}_team1_score', None),
+            'team2_score': getattr(game, f'quarter{q}_team2_score', None),
+            'team1_fouls': getattr(game, f'quarter{q}_team1_fouls', None),
+            'team2_fouls': getattr(game, f'quarter{q}_team2_fouls', None),
+            'finished_time': getattr(game, f'quarter{q}_finished_time', None)
+        }
+        for q in range(1, 5)
+    ]
+
+
+def _basketball_details(game):
+    return {
+        'current_quarter': game.current_quarter,
+        'team1_fouls_current_quarter': game.team1_fouls_current_quarter,
+        'team2_fouls_current_quarter': game.team2_fouls_current_quarter,
+        'winner': {
+            'id': game.winner.id,
+            'name': game.winner.name,
+        } if game.winner else None,
+        'active_players': {
+            'team1': [{'id': p.id, 'name': p.name} for p in game.get_team1_active_players()],
+            'team2': [{'id': p.id, 'name': p.name} for p in game.get_team2_active_players()],
+        },
+        'quarters': _quarters(game),
+    }
+
+
+def _basketball_events(game_id, kind):
+    if kind == 'shots':
+        shots = BasketballShot.objects.filter(game_id=game_id).select_related('player', 'team', 'assist_player').order_by('-created_at')
+        return [{
+            'type': 'shot',
+            'id': shot.id,
+            'timestamp': shot.created_at,
+            'quarter': shot.quarter,
+            'team': {'id': shot.team.id, 'name': shot.team.name},
+            'player': {'id': shot.player.id, 'name': shot.player.name},
+            'shot_type': shot.shot_type,
+            'shot_type_display': shot.get_shot_type_display(),
+            'points_scored': shot.points_scored,
+        } for shot in shots]
+
+    if kind == 'fouls':
+        fouls = BasketballFoul.objects.filter(game_id=game_id).select_related('player', 'team', 'fouled_player').order_by('-created_at')
+        return [{
+            'type': 'foul',
+            'id': foul.id,
+            'timestamp': foul.created_at,
+            'quarter': foul.quarter,
+            'team': {'id': foul.team.id, 'name': foul.team.name},
+            'player': {'id': foul.player.id, 'name': foul.player.name},
+        } for foul in fouls]
+
+    substitutions = BasketballSubstitution.objects.filter(game_id=game_id).select_related('team', 'player_out', 'player_in').order_by('-created_at')
+    return [{
+        'type': 'substitution',
+        'id': sub.id,
+        'timestamp': sub.created_at,
+        'quarter': sub.quarter,
+        'team': {'id': sub.team.id, 'name': sub.team.name},
+        'player_out': {'id': sub.player_out.id, 'name': sub.player_out.name},
+        'player_in': {'id': sub.player_in.id, 'name': sub.player_in.name},
+    } for sub in substitutions]
+
+
+def _basketball_row(game_id, details):
+    game = Basketball.objects.filter(pk=game_id).select_related('winner').first()
+    return game, _basketball_details(game) if game and details else None
+
+
+def _cricket_row(game_id):
+    game = Cricket.objects.filter(pk=game_id).select_related('current_batsman', 'current_bowler').first()
+    return game, _cricket_details(game) if game else None
+
+
+def _basketball_player_statistics(game):
+    box = BoxScoreEngine(game)
+    return {
+        'team1': [box.line(stat) for stat in box.players(game.team1_id)],
+        'team2': [box.line(stat) for stat in box.players(game.team2_id)],
+    }
+
+
+def _football_events(game_id):
+    score_events = ScoreEvent.objects.filter(game_id=game_id, sport='FOOTBALL').select_related('team', 'player').order_by('-created_at')
+    return [
+        {
+            'type': 'goal',
+            'timestamp': event.created_at,
+            'team': {'id': event.team.id, 'name': event.team.name},
+            'player': {
+                'id': event.player.id,
+                'name': event.player.name
+            } if event.player else None,
+            'points': event.points,
+        }
+        for event in score_events
+    ]
+
+
+def _cricket_details(game):
+    return {
+        'team1_deaths': game.team1_deaths,
+        'team2_deaths': game.team2_deaths,
+        'batting_side': game.batting_side,
+        'current_batsman': {
+            'id': game.current_batsman.id,
+            'name': game.current_batsman.name,
+        } if game.current_batsman else None,
+        'current_bowler': {
+            'id': game.current_bowler.id,
+            'name': game.current_bowler.name,
+        } if game.current_bowler else None,
+    }
 
 
 @require_GET
-def api_match_detail(request, match_id: int):
-    """API endpoint to get comprehensive match details including all events"""
-    game = get_object_or_404(Game, pk=match_id)
-    
-    # Basic match data
+@versions.for_game('match_id')
+@caching.for_game('match_id')
+async def api_match_detail(request, match_id: int):
+    """API endpoint to get comprehensive match details including all events
+
+    ?fields=team1_score,team2_score,status keeps only those top-level fields and
+    ?include=shots,player_stats only those sections (details, events or one of
+    EVENT_KINDS, player_stats); sections left out are not queried, the others
+    are queried side by side. With include= alone only id and sport come with
+    the sections. Without either parameter the full match is returned.
+    """
+    try:
+        fields, includes = _detail_params(request)
+    except ValueError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    games = Game.objects.all()
+    if fields & {'team1', 'team2'}:
+        games = games.select_related('team1', 'team2')
+    game = await aget_object_or_404(games, pk=match_id)
+
+    # The sport-specific row is only read for the sections that need it
+    sections = {}
+    if game.sport == 'BASKETBALL':
+        if 'winner' in fields or 'details' in includes:
+            sections['row'] = partial(_basketball_row, game.pk, 'details' in includes)
+        for kind in ('shots', 'fouls', 'substitutions'):
+            if kind in includes:
+                sections[kind] = partial(_basketball_events, game.pk, kind)
+        if 'player_stats' in includes:
+            sections['player_stats'] = partial(_basketball_player_statistics, game)
+    elif game.sport == 'FOOTBALL':
+        if 'goals' in includes:
+            sections['goals'] = partial(_football_events, game.pk)
+    elif game.sport == 'CRICKET':
+        if 'details' in includes:
+            sections['row'] = partial(_cricket_row, game.pk)
+    results = dict(zip(sections, await parallel.gather(*sections.values())))
+    sport_game, details = results.get('row', (None, None))
+    winner = getattr(sport_game, 'winner', None)
+
     match_data = {
         'id': game.id,
         'sport': game.sport,
         'status': game.status,
-        'scheduled_time': game.scheduled_time.isoformat() if game.scheduled_time else None,
+        'scheduled_time': game.scheduled_time,
         'team1': {
             'id': game.team1.id,
             'name': game.team1.name,
             'logo': game.team1.logo,
-        },
+        } if 'team1' in fields else None,
         'team2': {
             'id': game.team2.id,
             'name': game.team2.name,
             'logo': game.team2.logo,
-        },
+        } if 'team2' in fields else None,
         'team1_score': game.team1_score,
         'team2_score': game.team2_score,
         'winner': {
-            'id': game.winner.id,
-            'name': game.winner.name
-        } if hasattr(game, 'winner') and game.winner else None,
-        'created_at': game.created_at.isoformat(),
-        'updated_at': game.updated_at.isoformat(),
-        'events': []
+            'id': winner.id,
+            'name': winner.name
+        } if winner else None,
+        'created_at': game.created_at,
+        'updated_at': game.updated_at,
     }
-    
-    if game.sport == 'BASKETBALL':
-        try:
-            basketball_game = Basketball.objects.get(id=game.id)
-            
-            # Basketball-specific details
-            match_data['basketball_details'] = {
-                'current_quarter': basketball_game.current_quarter,
-                'team1_fouls_current_quarter': basketball_game.team1_fouls_current_quarter,
-                'team2_fouls_current_quarter': basketball_game.team2_fouls_current_quarter,
-                'winner': {
-                    'id': basketball_game.winner.id,
-                    'name': basketball_game.winner.name,
-                } if basketball_game.winner else None,
-                'active_players': {
-                    'team1': [{'id': p.id, 'name': p.name} for p in basketball_game.get_team1_active_players()],
-                    'team2': [{'id': p.id, 'name': p.name} for p in basketball_game.get_team2_active_players()],
-                },
-                'quarters': [
-                    {
-                        'quarter': 1,
-                        'team1_score': getattr(basketball_game, 'quarter1_team1_score', None),
-                        'team2_score': getattr(basketball_game, 'quarter1_team2_score', None),
-                        'team1_fouls': getattr(basketball_game, 'quarter1_team1_fouls', None),
-                        'team2_fouls': getattr(basketball_game, 'quarter1_team2_fouls', None),
-                        'finished_time': getattr(basketball_game, 'quarter1_finished_time', None).isoformat() if getattr(basketball_game, 'quarter1_finished_time', None) else None
-                    },
-                    {
-                        'quarter': 2,
-                        'team1_score': getattr(basketball_game, 'quarter2_team1_score', None),
-                        'team2_score': getattr(basketball_game, 'quarter2_team2_score', None),
-                        'team1_fouls': getattr(basketball_game, 'quarter2_team1_fouls', None),
-                        'team2_fouls': getattr(basketball_game, 'quarter2_team2_fouls', None),
-                        'finished_time': getattr(basketball_game, 'quarter2_finished_time', None).isoformat() if getattr(basketball_game, 'quarter2_finished_time', None) else None
-                    },
-                    {
-                        'quarter': 3,
-                        'team1_score': getattr(basketball_game, 'quarter3_team1_score', None),
-                        'team2_score': getattr(basketball_game, 'quarter3_team2_score', None),
-                        'team1_fouls': getattr(basketball_game, 'quarter3_team1_fouls', None),
-                        'team2_fouls': getattr(basketball_game, 'quarter3_team2_fouls', None),
-                        'finished_time': getattr(basketball_game, 'quarter3_finished_time', None).isoformat() if getattr(basketball_game, 'quarter3_finished_time', None) else None
-                    },
-                    {
-                        'quarter': 4,
-                        'team1_score': getattr(basketball_game, 'quarter4_team1_score', None),
-                        'team2_score': getattr(basketball_game, 'quarter4_team2_score', None),
-                        'team1_fouls': getattr(basketball_game, 'quarter4_team1_fouls', None),
-                        'team2_fouls': getattr(basketball_game, 'quarter4_team2_fouls', None),
-                        'finished_time': getattr(basketball_game, 'quarter4_finished_time', None).isoformat() if getattr(basketball_game, 'quarter4_finished_time', None) else None
-                    }
-                ]
-            }
-            
-            # Get all basketball events
-            events = []
-            
-            # Shots
-            shots = BasketballShot.objects.filter(game=basketball_game).select_related('player', 'team', 'assist_player').order_by('-created_at')
-            for shot in shots:
-                events.append({
-                    'type': 'shot',
-                    'id': shot.id,
-                    'timestamp': shot.created_at.isoformat(),
-                    'quarter': shot.quarter,
-                    'team': {'id': shot.team.id, 'name': shot.team.name},
-                    'player': {'id': shot.player.id, 'name': shot.player.name},
-                    'shot_type': shot.shot_type,
-                    'shot_type_display': shot.get_shot_type_display(),
-                    'points_scored': shot.points_scored,
-                })
-            
-            # Fouls
-            fouls = BasketballFoul.objects.filter(game=basketball_game).select_related('player', 'team', 'fouled_player').order_by('-created_at')
-            for foul in fouls:
-                events.append({
-                    'type': 'foul',
-                    'id': foul.id,
-                    'timestamp': foul.created_at.isoformat(),
-                    'quarter': foul.quarter,
-                    'team': {'id': foul.team.id, 'name': foul.team.name},
-                    'player': {'id': foul.player.id, 'name': foul.player.name},
-                })
-            
-            # Substitutions
-            substitutions = BasketballSubstitution.objects.filter(game=basketball_game).select_related('team', 'player_out', 'player_in').order_by('-created_at')
-            for sub in substitutions:
-                events.append({
-                    'type': 'substitution',
-                    'id': sub.id,
-                    'timestamp': sub.created_at.isoformat(),
-                    'quarter': sub.quarter,
-                    'team': {'id': sub.team.id, 'name': sub.team.name},
-                    'player_out': {'id': sub.player_out.id, 'name': sub.player_out.name},
-                    'player_in': {'id': sub.player_in.id, 'name': sub.player_in.name},
-                })
-            
-            # Sort all events by timestamp (most recent first)
-            events.sort(key=lambda x: x['timestamp'], reverse=True)
-            match_data['events'] = events
-            
-            # Player statistics
-            team1_stats = []
-            team2_stats = []
-            
-            for stat in PlayerStat.objects.filter(game=game, team=game.team1).select_related('player'):
-                player_shots = shots.filter(player=stat.player)
-                player_fouls = fouls.filter(player=stat.player).count()
-                team1_stats.append({
-                    'player': {'id': stat.player.id, 'name': stat.player.name},
-                    'points': stat.points,
-                    'shots_made': player_shots.filter(result='MADE').count(),
-                    'three_pointers_made': player_shots.filter(shot_type='3PT', result='MADE').count(),
-                    'free_throws_made': player_shots.filter(shot_type='FT', result='MADE').count(),
-                    'fouls': player_fouls,
-                })
-            
-            for stat in PlayerStat.objects.filter(game=game, team=game.team2).select_related('player'):
-                player_shots = shots.filter(player=stat.player)
-                player_fouls = fouls.filter(player=stat.player).count()
-                team2_stats.append({
-                    'player': {'id': stat.player.id, 'name': stat.player.name},
-                    'points': stat.points,
-                    'shots_made': player_shots.filter(result='MADE').count(),
-                    'three_pointers_made': player_shots.filter(shot_type='3PT', result='MADE').count(),
-                    'free_throws_made': player_shots.filter(shot_type='FT', result='MADE').count(),
-                    'fouls': player_fouls,
-                })
-            
-            match_data['player_statistics'] = {
-                'team1': team1_stats,
-                'team2': team2_stats,
-            }
-            
-        except Basketball.DoesNotExist:
-            pass
-    
-    elif game.sport == 'FOOTBALL':
-        # Add football-specific events if needed
-        score_events = ScoreEvent.objects.filter(game=game, sport='FOOTBALL').select_related('team', 'player').order_by('-created_at')
-        events = []
-        for event in score_events:
-            events.append({
-                'type': 'goal',
-                'timestamp': event.created_at.isoformat(),
-                'team': {'id': event.team.id, 'name': event.team.name},
-                'player': {
-                    'id': event.player.id,
-                    'name': event.player.name
-                } if event.player else None,
-                'points': event.points,
-            })
+    match_data = {key: value for key, value in match_data.items() if key in fields or key in ('id', 'sport')}
+
+    if includes & set(EVENT_KINDS):
+        events = [event for kind in EVENT_KINDS for event in results.get(kind, ())]
+        # Sort all events by timestamp (most recent first)
+        events.sort(key=lambda x: x['timestamp'], reverse=True)
         match_data['events'] = events
-    
-    elif game.sport == 'CRICKET':
-        # Add cricket-specific events if needed
-        try:
-            cricket_game = Cricket.objects.get(id=game.id)
-            match_data['cricket_details'] = {
-                'team1_deaths': cricket_game.team1_deaths,
-                'team2_deaths': cricket_game.team2_deaths,
-                'batting_side': cricket_game.batting_side,
-                'current_batsman': {
-                    'id': cricket_game.current_batsman.id,
-                    'name': cricket_game.current_batsman.name,
-                } if cricket_game.current_batsman else None,
-                'current_bowler': {
-                    'id': cricket_game.current_bowler.id,
-                    'name': cricket_game.current_bowler.name,
-                } if cricket_game.current_bowler else None,
-            }
-        except Cricket.DoesNotExist:
-            pass
-    
-    return JsonResponse(match_data)
+    if details is not None:
+        match_data[f'{game.sport.lower()}_details'] = details
+    if 'player_stats' in results:
+        match_data['player_statistics'] = results['player_stats']
+
+    return FastJsonResponse(match_data)
 
 @require_GET
 def api_local_ip(request):
@@ -1557,16 +1488,45 @@ def api_local_ip(request):
 
 
 @require_GET
+def live_health(request):
+    """Counters of the live broadcast pipeline, sockets and home page fragments in this worker"""
+    return JsonResponse({
+        'dispatcher': broadcast.dispatcher.stats(),
+        'feed': feed_stats(),
+        'fragments': fragments.fragment_stats(),
+    })
+
+
+@require_GET
+async def api_live_stream(request):
+    """Live patches as Server-Sent Events: /api/live/stream/?games=12,14&sports=basketball
+
+    Reconnects resume from the Last-Event-ID header (or ?last_seq=12:40,14:33).
+    """
+    game_ids = set(sorted(_parse_game_ids(request.GET.getlist('games')))[:MAX_SUBSCRIPTIONS])
+    sports = _parse_sports(request.GET.getlist('sports'))
+    last_seq = request.headers.get('Last-Event-ID') or request.GET.get('last_seq')
+    resume = _parse_last_seq([last_seq] if last_seq else [], game_ids)
+    response = StreamingHttpResponse(live_events(game_ids, sports, resume), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+@versions.for_all()
+@caching.for_all()
 def api_basketball_games(request):
     """API endpoint to get all basketball games with simplified data"""
-    games = Basketball.objects.select_related('team1', 'team2').all().order_by('-created_at')
+    games = load_matches(Basketball.objects.select_related('team1', 'team2', 'winner').all().order_by('-created_at'))
     data = []
     for game in games:
         data.append({
             'id': game.id,
             'status': game.status,
-            'scheduled_time': game.scheduled_time.isoformat() if game.scheduled_time else None,
-            'actual_start_time': game.actual_start_time.isoformat() if game.actual_start_time else None,
+            'scheduled_time': game.scheduled_time,
+            'actual_start_time': game.actual_start_time,
             'team1': {
                 'id': game.team1.id,
                 'name': game.team1.name,
@@ -1590,319 +1550,152 @@ def api_basketball_games(request):
                 'team1': [{'id': p.id, 'name': p.name} for p in game.get_team1_active_players()],
                 'team2': [{'id': p.id, 'name': p.name} for p in game.get_team2_active_players()],
             },
-            'created_at': game.created_at.isoformat(),
-            'updated_at': game.updated_at.isoformat(),
+            'created_at': game.created_at,
+            'updated_at': game.updated_at,
         })
-    return JsonResponse({'basketball_games': data})
+    return FastJsonResponse({'basketball_games': data})
 
 
 @require_GET
-def api_basketball_game_events(request, game_id: int):
-    """API endpoint to get all events for a specific basketball game"""
-    game = get_object_or_404(Basketball, pk=game_id)
-    
-    events = []
-    
-    # Shots
-    shots = BasketballShot.objects.filter(game=game).select_related('player', 'team', 'assist_player').order_by('-created_at')
-    for shot in shots:
-        events.append({
-            'type': 'shot',
-            'id': shot.id,
-            'timestamp': shot.created_at.isoformat(),
-            'quarter': shot.quarter,
-            'team': {'id': shot.team.id, 'name': shot.team.name},
-            'player': {'id': shot.player.id, 'name': shot.player.name},
-            'shot_type': shot.shot_type,
-            'result': shot.result,
-            'points_scored': shot.points_scored,
-            'assist_player': {
-                'id': shot.assist_player.id,
-                'name': shot.assist_player.name
-            } if shot.assist_player else None,
+@versions.for_game()
+async def api_basketball_game_events(request, game_id: int):
+    """API endpoint to get all events for a specific basketball game.
+
+    With ?since=<cursor> (empty for the start of the game) only the events
+    after the cursor come back, oldest first and at most ?limit of them,
+    together with the cursor to pass next time.
+    """
+    game = await aget_object_or_404(Basketball, pk=game_id)
+
+    if 'since' not in request.GET:
+        events, cursor = await aall_events(game.pk)
+        return FastJsonResponse({
+            'game_id': game.id,
+            'events': events,
+            'next_cursor': cursor,
         })
-    
-    # Fouls
-    fouls = BasketballFoul.objects.filter(game=game).select_related('player', 'team', 'fouled_player').order_by('-created_at')
-    for foul in fouls:
-        events.append({
-            'type': 'foul',
-            'id': foul.id,
-            'timestamp': foul.created_at.isoformat(),
-            'quarter': foul.quarter,
-            'team': {'id': foul.team.id, 'name': foul.team.name},
-            'player': {'id': foul.player.id, 'name': foul.player.name},
-            'foul_type': foul.foul_type,
-            'fouled_player': {
-                'id': foul.fouled_player.id,
-                'name': foul.fouled_player.name
-            } if foul.fouled_player else None,
-        })
-    
-    # Substitutions
-    substitutions = BasketballSubstitution.objects.filter(game=game).select_related('team', 'player_out', 'player_in').order_by('-created_at')
-    for sub in substitutions:
-        events.append({
-            'type': 'substitution',
-            'id': sub.id,
-            'timestamp': sub.created_at.isoformat(),
-            'quarter': sub.quarter,
-            'team': {'id': sub.team.id, 'name': sub.team.name},
-            'player_out': {'id': sub.player_out.id, 'name': sub.player_out.name},
-            'player_in': {'id': sub.player_in.id, 'name': sub.player_in.name},
-        })
-    
-    # Sort events by timestamp (most recent first)
-    events.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    return JsonResponse({
+
+    try:
+        events, cursor, has_more = await aevents_since(game.pk, request.GET['since'], parse_limit(request.GET.get('limit')))
+    except ValueError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+    return FastJsonResponse({
         'game_id': game.id,
-        'events': events
+        'events': events,
+        'next_cursor': cursor or request.GET['since'],
+        'has_more': has_more,
     })
 
 
 @require_GET
+@versions.for_game()
+@caching.for_game()
 def api_basketball_player_stats(request, game_id: int):
     """API endpoint to get player statistics for a basketball game"""
     game = get_object_or_404(Basketball, pk=game_id)
-    
-    # Get all shots and fouls for stats calculation
-    shots = BasketballShot.objects.filter(game=game).select_related('player', 'team', 'assist_player')
-    fouls = BasketballFoul.objects.filter(game=game).select_related('player')
-    
-    team1_stats = []
-    team2_stats = []
-    
-    # Team 1 stats
-    for stat in PlayerStat.objects.filter(game=game, team=game.team1).select_related('player'):
-        player_shots = shots.filter(player=stat.player)
-        player_fouls_count = fouls.filter(player=stat.player).count()
-        
-        team1_stats.append({
-            'player': {'id': stat.player.id, 'name': stat.player.name},
-            'points': stat.points,
-            'shots_made': player_shots.filter(result='MADE').count(),
-            'shots_attempted': player_shots.count(),
-            'three_pointers_made': player_shots.filter(shot_type='3PT', result='MADE').count(),
-            'three_pointers_attempted': player_shots.filter(shot_type='3PT').count(),
-            'free_throws_made': player_shots.filter(shot_type='FT', result='MADE').count(),
-            'free_throws_attempted': player_shots.filter(shot_type='FT').count(),
-            'fouls': player_fouls_count,
-            'assists': shots.filter(assist_player=stat.player).count(),
-        })
-    
-    # Team 2 stats
-    for stat in PlayerStat.objects.filter(game=game, team=game.team2).select_related('player'):
-        player_shots = shots.filter(player=stat.player)
-        player_fouls_count = fouls.filter(player=stat.player).count()
-        
-        team2_stats.append({
-            'player': {'id': stat.player.id, 'name': stat.player.name},
-            'points': stat.points,
-            'shots_made': player_shots.filter(result='MADE').count(),
-            'shots_attempted': player_shots.count(),
-            'three_pointers_made': player_shots.filter(shot_type='3PT', result='MADE').count(),
-            'three_pointers_attempted': player_shots.filter(shot_type='3PT').count(),
-            'free_throws_made': player_shots.filter(shot_type='FT', result='MADE').count(),
-            'free_throws_attempted': player_shots.filter(shot_type='FT').count(),
-            'fouls': player_fouls_count,
-            'assists': shots.filter(assist_player=stat.player).count(),
-        })
-    
-    return JsonResponse({
+    box = BoxScoreEngine(game)
+    return FastJsonResponse({
         'game_id': game.id,
-        'team1_stats': team1_stats,
-        'team2_stats': team2_stats,
+        'team1_stats': [box.line(stat) for stat in box.players(game.team1_id)],
+        'team2_stats': [box.line(stat) for stat in box.players(game.team2_id)],
     })
 
 
+def _recent_shots(game_id):
+    latest_shots = BasketballShot.objects.filter(game_id=game_id).select_related('player', 'team').order_by('-created_at')[:3]
+    return [{
+        'type': 'shot',
+        'timestamp': shot.created_at,
+        'player': shot.player.name,
+        'team': shot.team.name,
+        'description': f"{shot.player.name} - {shot.get_shot_type_display()} {shot.get_result_display()}",
+        'points': shot.points_scored,
+    } for shot in latest_shots]
+
+
+def _recent_fouls(game_id):
+    latest_fouls = BasketballFoul.objects.filter(game_id=game_id).select_related('player', 'team').order_by('-created_at')[:2]
+    return [{
+        'type': 'foul',
+        'timestamp': foul.created_at,
+        'player': foul.player.name,
+        'team': foul.team.name,
+        'description': f"{foul.player.name} - {foul.get_foul_type_display()}",
+    } for foul in latest_fouls]
+
+
 @require_GET  
-def api_basketball_live_update(request, game_id: int):
+@versions.for_game()
+@caching.for_game()
+async def api_basketball_live_update(request, game_id: int):
     """API endpoint for real-time basketball game updates - simplified"""
-    game = get_object_or_404(Basketball, pk=game_id)
-    
-    # Get latest events (last 5)
-    latest_shots = BasketballShot.objects.filter(game=game).order_by('-created_at')[:3]
-    latest_fouls = BasketballFoul.objects.filter(game=game).order_by('-created_at')[:2]
+    game = await aget_object_or_404(Basketball, pk=game_id)
     
-    recent_events = []
-    
-    for shot in latest_shots:
-        recent_events.append({
-            'type': 'shot',
-            'timestamp': shot.created_at.isoformat(),
-            'player': shot.player.name,
-            'team': shot.team.name,
-            'description': f"{shot.player.name} - {shot.get_shot_type_display()} {shot.get_result_display()}",
-            'points': shot.points_scored,
-        })
-    
-    for foul in latest_fouls:
-        recent_events.append({
-            'type': 'foul',
-            'timestamp': foul.created_at.isoformat(),
-            'player': foul.player.name,
-            'team': foul.team.name,
-            'description': f"{foul.player.name} - {foul.get_foul_type_display()}",
-        })
+    # Get latest events (last 5), shots and fouls side by side
+    shots, fouls = await parallel.gather(partial(_recent_shots, game.pk), partial(_recent_fouls, game.pk))
+    recent_events = shots + fouls
     
     # Sort by timestamp
     recent_events.sort(key=lambda x: x['timestamp'], reverse=True)
     
-    return JsonResponse({
-        'game_id': game.id,
-        'status': game.status,
-        'quarter': game.current_quarter,
-        'team1_score': game.team1_score,
-        'team2_score': game.team2_score,
-        'team1_fouls': game.team1_fouls_current_quarter,
-        'team2_fouls': game.team2_fouls_current_quarter,
+    return FastJsonResponse({
+        **GameSnapshot(game).live_update(),
         'recent_events': recent_events[:5]
     })
 
 
 @require_GET
+@versions.for_all()
+@caching.for_all()
 def api_basketball_overall_player_stats(request):
     """API endpoint to get simplified player statistics across all basketball games, sorted by total points"""
-    
-    # Get all player stats from basketball games
-    all_stats = PlayerStat.objects.filter(game__sport='BASKETBALL').select_related('player', 'team')
-    
-    # Dictionary to accumulate stats by player
-    player_stats_dict = {}
-    
-    for stat in all_stats:
-        player_id = stat.player.id
-        
-        if player_id not in player_stats_dict:
-            player_stats_dict[player_id] = {
-                'name': stat.player.name,
-                'team': stat.team.name,
-                'total_matches': 0,
-                'total_3pt': 0,
-                'total_2pt': 0,
-                'total_1pt': 0,
-            }
-        
-        player_stats_dict[player_id]['total_matches'] += 1
-    
-    # Get shot statistics to calculate points by type
-    all_shots = BasketballShot.objects.filter(game__sport='BASKETBALL', result='MADE').select_related('player')
-    
-    for shot in all_shots:
-        player_id = shot.player.id
-        if player_id in player_stats_dict:
-            if shot.shot_type == '3PT':
-                player_stats_dict[player_id]['total_3pt'] += 3
-            elif shot.shot_type == '2PT':
-                player_stats_dict[player_id]['total_2pt'] += 2
-            elif shot.shot_type == 'FT':
-                player_stats_dict[player_id]['total_1pt'] += 1
-    
-    # Convert to list
-    player_stats_list = []
-    for stats in player_stats_dict.values():
-        total_points = stats['total_3pt'] + stats['total_2pt'] + stats['total_1pt']
-        player_stats_list.append({
-            'name': stats['name'],
-            'team': stats['team'],
-            'total_matches': stats['total_matches'],
-            'total_3pt': stats['total_3pt'],
-            'total_2pt': stats['total_2pt'],
-            'total_1pt': stats['total_1pt'],
-            'total_points': total_points
-        })
-    
-    # Sort by total points in descending order
-    player_stats_list.sort(key=lambda x: x['total_points'], reverse=True)
-    
-    return JsonResponse({
+    # Kept up to date as shots and stats are written (see games.aggregates)
+    aggregates = (
+        PlayerSeasonAggregate.objects.filter(total_matches__gt=0)
+        .select_related('player', 'team')
+        .order_by('-total_points', 'player_id')
+    )
+    player_stats_list = [{
+        'name': a.player.name,
+        'team': a.team.name,
+        'total_matches': a.total_matches,
+        'total_3pt': a.total_3pt,
+        'total_2pt': a.total_2pt,
+        'total_1pt': a.total_1pt,
+        'total_points': a.total_points,
+    } for a in aggregates]
+
+    return FastJsonResponse({
         'player_stats': player_stats_list,
         'total_players': len(player_stats_list)
     })
 
 
 @require_GET
+@versions.for_all()
+@caching.for_all()
 def api_basketball_team_standings(request):
     """API endpoint to get team standings with wins, losses, and NRR for points table"""
-    
-    # Get all basketball games that are finished
-    finished_games = Basketball.objects.filter(status='FINISHED').select_related('team1', 'team2', 'winner')
-    
-    # Get ALL teams, not just ones that have played
-    from .models import Team
-    all_teams = Team.objects.all()
-    
-    # Dictionary to store team statistics
-    team_stats = {}
-    
-    # Initialize stats for ALL teams
-    for team in all_teams:
-        team_stats[team.id] = {
-            'name': team.name,
-            'matches_played': 0,
-            'wins': 0,
-            'losses': 0,
-            'points_scored': 0,
-            'points_conceded': 0,
-            'nrr': 0.0,
-            'points': 0  # Points for standings (1 for win, 0 for loss)
-        }
-    
-    # Calculate stats from finished games
-    for game in finished_games:
-        team1_id = game.team1.id
-        team2_id = game.team2.id
-        
-        # Update matches played
-        team_stats[team1_id]['matches_played'] += 1
-        team_stats[team2_id]['matches_played'] += 1
-        
-        # Update points scored and conceded
-        team_stats[team1_id]['points_scored'] += game.team1_score
-        team_stats[team1_id]['points_conceded'] += game.team2_score
-        team_stats[team2_id]['points_scored'] += game.team2_score
-        team_stats[team2_id]['points_conceded'] += game.team1_score
-        
-        # Determine winner and update wins/losses
-        if game.winner:
-            winner_id = game.winner.id
-            loser_id = team2_id if winner_id == team1_id else team1_id
-            
-            team_stats[winner_id]['wins'] += 1
-            team_stats[winner_id]['points'] += 1  # 1 point for win
-            team_stats[loser_id]['losses'] += 1
-            # Loser gets 0 points (no change needed)
-        else:
-            # It's a tie - both teams get 0 points (no winner/loser)
-            # No points awarded for ties
-            pass
-    
-    # Calculate NRR for each team
-    for team_id in team_stats:
-        stats = team_stats[team_id]
-        if stats['matches_played'] > 0:
-            # NRR = (Points Scored - Points Conceded)
-            stats['nrr'] = stats['points_scored'] - stats['points_conceded']
-    
-    # Convert to list and sort by points, then by NRR
+    # Every team, played or not; the rows are kept up to date by games.standings
     standings_list = []
-    for stats in team_stats.values():
+    for team in Team.objects.select_related('standing'):
+        row = getattr(team, 'standing', None) or TeamStanding(team=team)
         standings_list.append({
-            'team': stats['name'],
-            'matches_played': stats['matches_played'],
-            'wins': stats['wins'],
-            'losses': stats['losses'],
-            'points_scored': stats['points_scored'],
-            'points_conceded': stats['points_conceded'],
-            'nrr': stats['nrr'],
-            'points': stats['points']
+            'team': team.name,
+            'matches_played': row.matches_played,
+            'wins': row.wins,
+            'losses': row.losses,
+            'points_scored': row.points_scored,
+            'points_conceded': row.points_conceded,
+            # NRR = (Points Scored - Points Conceded)
+            'nrr': row.points_scored - row.points_conceded if row.matches_played > 0 else 0.0,
+            'points': row.points
         })
     
     # Sort by points (descending), then by NRR (descending)
     standings_list.sort(key=lambda x: (x['points'], x['nrr']), reverse=True)
     
-    return JsonResponse({
+    return FastJsonResponse({
         'team_standings': standings_list,
         'total_teams': len(standings_list)
     })
\ No newline at end of file